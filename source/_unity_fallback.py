@@ -0,0 +1,89 @@
+"""
+Windows Unity-bundled AndroidPlayer discovery.
+
+Split out of `emulator_setup` so CI runs — which always provide
+ANDROID_SDK_ROOT — never import or execute the Unity-specific scanning code.
+`emulator_setup.locate_android_tools` imports this module lazily only when no
+SDK env vars are set.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+# Keyed on the directory mtime so a real install/uninstall under Hub/Editor
+# invalidates the cache while repeat lookups within one run stay free.
+@functools.lru_cache(maxsize=8)
+def _find_unity_versions_cached(base_str: str, _mtime_ns: int) -> Tuple[str, ...]:
+    versions: List[str] = []
+    with os.scandir(base_str) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                versions.append(entry.name)
+    versions.sort(reverse=True)
+    return tuple(versions)
+
+
+def find_unity_versions(base_unity_hub: Path) -> List[str]:
+    try:
+        mtime_ns = os.stat(base_unity_hub).st_mtime_ns
+        return list(_find_unity_versions_cached(str(base_unity_hub), mtime_ns))
+    except OSError:
+        return []
+
+
+def pick_unity_version(available: List[str], prefer: Optional[str] = None) -> Optional[str]:
+    if not available:
+        return None
+    if prefer and prefer in available:
+        return prefer
+    return available[0]
+
+
+def locate_unity_android_tools(program_files: Path):
+    """Locate SDK/JDK under a Unity Hub install (historical Windows default).
+
+    Raises RuntimeError if critical components are missing.
+    """
+    from .emulator_setup import AndroidTools, _MANAGER_BIN_DIRS, _find_sdk_tool, _first_existing_str
+
+    unity_hub_editor = program_files / "Unity" / "Hub" / "Editor"
+    versions = find_unity_versions(unity_hub_editor)
+    selected = pick_unity_version(versions, prefer="6000.0.62f1")
+    if not selected:
+        raise RuntimeError("No Unity versions found under Program Files.")
+
+    android_player = unity_hub_editor / selected / "Editor" / "Data" / "PlaybackEngines" / "AndroidPlayer"
+    if not android_player.exists():
+        raise RuntimeError("AndroidPlayer folder not found under Unity installation.")
+
+    sdk_root = android_player / "SDK"
+    jdk_root = android_player / "OpenJDK"
+
+    if not sdk_root.exists():
+        raise RuntimeError("SDK folder not found.")
+    if not jdk_root.exists():
+        raise RuntimeError("OpenJDK folder not found.")
+
+    # Probe candidates as strings; .exe/.bat first on the Unity Windows layout.
+    sdk = str(sdk_root)
+    adb = _first_existing_str(os.path.join(sdk, "platform-tools"), ("adb.exe", "adb"))
+    emulator = _first_existing_str(os.path.join(sdk, "emulator"), ("emulator.exe", "emulator"))
+    avdmanager = _find_sdk_tool(sdk, _MANAGER_BIN_DIRS, ("avdmanager.bat", "avdmanager"))
+    sdkmanager = _find_sdk_tool(sdk, _MANAGER_BIN_DIRS, ("sdkmanager.bat", "sdkmanager"))
+
+    if not (adb and emulator and avdmanager and sdkmanager):
+        raise RuntimeError("Required Android tools not found (adb/emulator/avdmanager/sdkmanager).")
+
+    return AndroidTools(
+        sdk_root=sdk_root,
+        jdk_root=jdk_root,
+        adb=Path(adb),
+        emulator=Path(emulator),
+        avdmanager=Path(avdmanager),
+        sdkmanager=Path(sdkmanager),
+    )
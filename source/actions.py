@@ -36,6 +36,66 @@ _KEYEVENT_ALIASES = {
 }
 
 
+def _cmd_wait(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.wait(float(step.get("seconds", 1)))
+
+
+def _cmd_tap(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.tap(int(step["x"]), int(step["y"]))
+
+
+def _cmd_swipe(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.swipe(
+        int(step["x1"]), int(step["y1"]),
+        int(step["x2"]), int(step["y2"]),
+        int(step.get("duration_ms", 300)),
+    )
+
+
+def _cmd_input_text(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.input_text(str(step["text"]))
+
+
+def _cmd_keyevent(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.keyevent(str(step.get("code") or step.get("name")))
+
+
+def _cmd_back(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.back()
+
+
+def _cmd_home(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.home()
+
+
+def _cmd_screenshot(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.screenshot(Path(step["path"]))
+
+
+def _cmd_launch(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.launch_app(str(step.get("package", package)), step.get("activity"))
+
+
+def _cmd_stop(device: AndroidDevice, step: Dict[str, Any], package: str) -> None:
+    device.stop_app(str(step.get("package", package)))
+
+
+# Built once at module load: O(1) lookup replaces an if/elif ladder in the
+# per-turn hot path.
+_COMMAND_HANDLERS = {
+    "wait": _cmd_wait,
+    "tap": _cmd_tap,
+    "swipe": _cmd_swipe,
+    "input_text": _cmd_input_text,
+    "keyevent": _cmd_keyevent,
+    "back": _cmd_back,
+    "home": _cmd_home,
+    "screenshot": _cmd_screenshot,
+    "launch": _cmd_launch,
+    "stop": _cmd_stop,
+}
+
+
 def execute_command(device: AndroidDevice, step: Dict[str, Any], package: str = "") -> None:
     """Execute a deterministic test command (tap, swipe, wait, etc.).
 
@@ -45,33 +105,10 @@ def execute_command(device: AndroidDevice, step: Dict[str, Any], package: str =
     cmd = step.get("cmd")
     if not cmd:
         return
-
-    if cmd == "wait":
-        device.wait(float(step.get("seconds", 1)))
-    elif cmd == "tap":
-        device.tap(int(step["x"]), int(step["y"]))
-    elif cmd == "swipe":
-        device.swipe(
-            int(step["x1"]), int(step["y1"]),
-            int(step["x2"]), int(step["y2"]),
-            int(step.get("duration_ms", 300)),
-        )
-    elif cmd == "input_text":
-        device.input_text(str(step["text"]))
-    elif cmd == "keyevent":
-        device.keyevent(str(step.get("code") or step.get("name")))
-    elif cmd == "back":
-        device.back()
-    elif cmd == "home":
-        device.home()
-    elif cmd == "screenshot":
-        device.screenshot(Path(step["path"]))
-    elif cmd == "launch":
-        device.launch_app(str(step.get("package", package)), step.get("activity"))
-    elif cmd == "stop":
-        device.stop_app(str(step.get("package", package)))
-    else:
+    handler = _COMMAND_HANDLERS.get(cmd)
+    if handler is None:
         raise ValueError(f"Unknown command: {cmd}")
+    handler(device, step, package)
 
 
 def _normalize_keyevent(raw_key: Any) -> Optional[str]:
@@ -91,85 +128,125 @@ def _normalize_keyevent(raw_key: Any) -> Optional[str]:
     return None
 
 
-def map_computer_action(device: AndroidDevice, action: Dict[str, Any]) -> Optional[str]:
-    """Execute an LLM Computer Use action via ADB. Returns optional status string."""
+def _act_click(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    x = action.get("x")
+    y = action.get("y")
+    if x is None or y is None:
+        return "error: missing coordinates"
+    device.tap(int(x), int(y))
+    return "success"
+
 
-    atype = action.get("type")
+def _act_double_click(device: AndroidDevice, action: Dict[str, Any]) -> str:
     x = action.get("x")
     y = action.get("y")
-    if atype == "click":
-        if x is None or y is None:
-            return "error: missing coordinates"
-        device.tap(int(x), int(y))
-        return "success"
-    if atype == "double_click":
-        if x is None or y is None:
-            return "error: missing coordinates"
-        device.tap(int(x), int(y))
-        time.sleep(0.1)
-        device.tap(int(x), int(y))
-        return "success"
-    if atype == "drag":
-        x2 = action.get("x2")
-        y2 = action.get("y2")
-        duration_ms = int(action.get("duration_ms", 300))
-        if x2 is None or y2 is None:
-            path = action.get("path")
-            if isinstance(path, list) and len(path) >= 2:
-                try:
-                    start = path[0]
-                    end = path[-1]
-                    x = start.get("x", x)
-                    y = start.get("y", y)
-                    x2 = end.get("x")
-                    y2 = end.get("y")
-                except Exception:
-                    pass
-        if None in (x, y, x2, y2):
-            return "error: missing drag coordinates"
-        device.swipe(int(x), int(y), int(x2), int(y2), duration_ms)
-        return "success"
-    if atype == "scroll":
-        dx = action.get("dx")
-        dy = action.get("dy")
-        if dx is None:
-            dx = action.get("scroll_x")
-        if dy is None:
-            dy = action.get("scroll_y")
-        duration_ms = int(action.get("duration_ms", 300))
-        if None in (x, y, dx, dy):
-            return "error: missing scroll parameters"
-        device.swipe(int(x), int(y), int(int(x) + int(dx)), int(int(y) + int(dy)), duration_ms)
-        return "success"
-    if atype == "type":
-        text = action.get("text", "")
-        device.input_text(str(text))
-        return "success"
-    if atype == "keypress":
-        keys = action.get("keys")
-        if not isinstance(keys, list) or not keys:
-            return "error: missing keys"
-        normalized_keys = []
-        for raw_key in keys:
-            normalized = _normalize_keyevent(raw_key)
-            if normalized is None:
-                return f"error: unsupported key {raw_key!r}"
-            normalized_keys.append(normalized)
-        for key in normalized_keys:
-            device.keyevent(key)
-        return "success"
-    if atype == "key":
-        key = _normalize_keyevent(action.get("key") or action.get("code"))
-        if not key:
-            return "error: missing key"
+    if x is None or y is None:
+        return "error: missing coordinates"
+    device.tap(int(x), int(y))
+    time.sleep(0.1)
+    device.tap(int(x), int(y))
+    return "success"
+
+
+def _act_drag(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    x = action.get("x")
+    y = action.get("y")
+    x2 = action.get("x2")
+    y2 = action.get("y2")
+    duration_ms = int(action.get("duration_ms", 300))
+    if x2 is None or y2 is None:
+        path = action.get("path")
+        if isinstance(path, list) and len(path) >= 2:
+            try:
+                start = path[0]
+                end = path[-1]
+                x = start.get("x", x)
+                y = start.get("y", y)
+                x2 = end.get("x")
+                y2 = end.get("y")
+            except Exception:
+                pass
+    if None in (x, y, x2, y2):
+        return "error: missing drag coordinates"
+    device.swipe(int(x), int(y), int(x2), int(y2), duration_ms)
+    return "success"
+
+
+def _act_scroll(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    x = action.get("x")
+    y = action.get("y")
+    dx = action.get("dx")
+    dy = action.get("dy")
+    if dx is None:
+        dx = action.get("scroll_x")
+    if dy is None:
+        dy = action.get("scroll_y")
+    duration_ms = int(action.get("duration_ms", 300))
+    if None in (x, y, dx, dy):
+        return "error: missing scroll parameters"
+    ix, iy = int(x), int(y)
+    device.swipe(ix, iy, ix + int(dx), iy + int(dy), duration_ms)
+    return "success"
+
+
+def _act_type(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    device.input_text(str(action.get("text", "")))
+    return "success"
+
+
+def _act_keypress(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    keys = action.get("keys")
+    if not isinstance(keys, list) or not keys:
+        return "error: missing keys"
+    normalized_keys = []
+    for raw_key in keys:
+        normalized = _normalize_keyevent(raw_key)
+        if normalized is None:
+            return f"error: unsupported key {raw_key!r}"
+        normalized_keys.append(normalized)
+    for key in normalized_keys:
         device.keyevent(key)
-        return "success"
-    if atype == "move":
-        return "success"
-    if atype == "wait":
-        seconds = float(action.get("seconds", 1))
-        device.wait(seconds)
-        return "success"
-    if atype == "screenshot":
-        return "success"
-    return None
+    return "success"
+
+
+def _act_key(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    key = _normalize_keyevent(action.get("key") or action.get("code"))
+    if not key:
+        return "error: missing key"
+    device.keyevent(key)
+    return "success"
+
+
+def _act_move(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    return "success"
+
+
+def _act_wait(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    device.wait(float(action.get("seconds", 1)))
+    return "success"
+
+
+def _act_screenshot(device: AndroidDevice, action: Dict[str, Any]) -> str:
+    return "success"
+
+
+_ACTION_HANDLERS = {
+    "click": _act_click,
+    "double_click": _act_double_click,
+    "drag": _act_drag,
+    "scroll": _act_scroll,
+    "type": _act_type,
+    "keypress": _act_keypress,
+    "key": _act_key,
+    "move": _act_move,
+    "wait": _act_wait,
+    "screenshot": _act_screenshot,
+}
+
+
+def map_computer_action(device: AndroidDevice, action: Dict[str, Any]) -> Optional[str]:
+    """Execute an LLM Computer Use action via ADB. Returns optional status string."""
+    handler = _ACTION_HANDLERS.get(action.get("type"))
+    if handler is None:
+        return None
+    return handler(device, action)
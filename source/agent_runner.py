@@ -30,14 +30,19 @@ Notes:
 
 from __future__ import annotations
 
-import base64
+import binascii
+import gzip
+import hashlib
+import io
 import json
+import mmap
 import os
 import sys
+import threading
 import time
 import subprocess
-import tempfile
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 import re
@@ -52,7 +57,33 @@ try:
 except Exception:
     Image = None
 
-from .android_framework import AndroidDevice
+# orjson serializes multi-MB raw responses far faster than stdlib json.
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# lz4 compresses the persisted raw responses faster than the disk write it saves.
+try:
+    import lz4.frame as lz4_frame
+except Exception:
+    lz4_frame = None
+
+# pybase64 dispatches to AVX2/SSSE3 encoders at runtime (~3x stdlib on
+# megabyte-sized screenshots).
+try:
+    import pybase64
+except Exception:
+    pybase64 = None
+
+
+def _b64_ascii(data) -> str:
+    """Base64-encode a bytes-like object to an ASCII str, SIMD when available."""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+from .android_framework import AdbShellSession, AndroidDevice, save_marked_screenshot
 from .actions import map_computer_action, execute_command
 from .app_lifecycle import parse_install_config, prepare_app, teardown_app
 from .reporting import VideoRecorder, write_summary_json, write_agent_log, write_web_report
@@ -61,6 +92,11 @@ from .llm import create_provider, LLMOutputType
 DEFAULT_MAX_STEPS = 250
 MAX_AGENT_STEPS = int(os.environ.get("AGENT_MAX_STEPS", os.environ.get("OPENAI_AGENT_MAX_STEPS", str(DEFAULT_MAX_STEPS))))
 WAIT_BETWEEN_ACTIONS = float(os.environ.get("OPENAI_AGENT_WAIT_BETWEEN_ACTIONS", "1.5"))
+# Number of consecutive identical frames after which the screenshot upload is skipped.
+STALE_FRAME_THRESHOLD = 2
+# While the screen stays frozen, a real frame is still re-sent every this many
+# stale turns so the model is never left without an image for long stretches.
+STALE_RESEND_EVERY = 5
 
 
 BASE_SYSTEM_PROMPT = (
@@ -123,43 +159,82 @@ def parse_terminal_result(texts: List[str]) -> Tuple[Optional[bool], str]:
 
 
 def encode_file_base64(path: Path) -> str:
+    # mmap + binascii avoids one intermediate bytes copy of multi-MB screenshots
+    # and skips base64's MIME line-wrapping branch.
     with path.open("rb") as f:
-        return base64.b64encode(f.read()).decode("ascii")
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _b64_ascii(mm)
+        except ValueError:
+            # Empty files cannot be mapped
+            return _b64_ascii(f.read())
 
 
-def _read_image_size(path: Path) -> Tuple[int, int]:
+JPEG_QUALITY = 80
+
+
+def _png_bytes_to_jpeg(png_bytes: bytes, quality: int = JPEG_QUALITY) -> Optional[bytes]:
+    """Re-encode PNG screenshot bytes as JPEG to shrink the LLM payload.
+
+    A raw emulator PNG easily exceeds 1 MB; JPEG at quality ~80 is 5-10x
+    smaller with no practical loss for UI navigation. Returns None when PIL
+    is unavailable or conversion fails so callers can keep the PNG.
+    """
+    if Image is None:
+        return None
+    try:
+        buf = io.BytesIO()
+        with Image.open(io.BytesIO(png_bytes)) as img:
+            # optimize=True adds a second Huffman pass that roughly doubles
+            # encode time for a few percent of size; not worth it per frame.
+            img.convert("RGB").save(buf, "JPEG", quality=quality, optimize=False)
+        return buf.getvalue()
+    except Exception:
+        return None
+
+
+def _image_bytes_to_payload(png_bytes: bytes) -> Tuple[str, str]:
+    """Encode screenshot bytes once and return a (media_type, base64) pair.
+
+    Providers consume the pair directly, so the base64 string is allocated a
+    single time per frame instead of being wrapped in a data URL and split
+    back apart downstream.
+    """
+    jpeg_bytes = _png_bytes_to_jpeg(png_bytes)
+    if jpeg_bytes is not None:
+        return "image/jpeg", _b64_ascii(jpeg_bytes)
+    return "image/png", _b64_ascii(png_bytes)
+
+
+def _read_image_size_from_bytes(data: bytes) -> Tuple[int, int]:
     if Image is None:
         return 0, 0
     try:
-        with Image.open(path) as img:
+        with Image.open(io.BytesIO(data)) as img:
             return int(img.width), int(img.height)
     except Exception:
         return 0, 0
 
 
-def take_screenshot_payload(device: AndroidDevice, _out_dir: Path) -> Tuple[str, int, int]:
-    """Capture a clean screenshot and return (data_url, width, height)."""
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tf:
-        temp_path = Path(tf.name)
-    try:
-        device.screenshot(temp_path)
-        width, height = _read_image_size(temp_path)
-        data_url = "data:image/png;base64," + encode_file_base64(temp_path)
-    finally:
-        try:
-            os.remove(temp_path)
-        except Exception:
-            pass
-    return data_url, width, height
+def _frame_digest(png_bytes: bytes) -> bytes:
+    """Cheap content hash used to detect frames identical to the previous one."""
+    return hashlib.blake2b(png_bytes, digest_size=8).digest()
+
 
+def take_screenshot_payload(device: AndroidDevice, _out_dir: Path) -> Tuple[Tuple[str, str], int, int, bytes]:
+    """Capture a clean screenshot in memory; return ((media_type, b64), width, height, digest)."""
+    png_bytes = device.screenshot_bytes()
+    width, height = _read_image_size_from_bytes(png_bytes)
+    return _image_bytes_to_payload(png_bytes), width, height, _frame_digest(png_bytes)
 
-def take_screenshot_b64(device: AndroidDevice, _out_dir: Path) -> str:
-    """Capture a clean screenshot to a temporary file and return as data URL.
 
-    Note: Does NOT persist the clean image under reports; it uses a temp file.
+def take_screenshot_b64(device: AndroidDevice, _out_dir: Path) -> Tuple[str, str]:
+    """Capture a clean screenshot in memory and return it as a (media_type, b64) pair.
+
+    Note: Does NOT persist the clean image under reports.
     """
-    data_url, _, _ = take_screenshot_payload(device, _out_dir)
-    return data_url
+    payload, _, _, _ = take_screenshot_payload(device, _out_dir)
+    return payload
 
 
 def take_screenshot_b64_marking(
@@ -167,10 +242,10 @@ def take_screenshot_b64_marking(
     out_dir: Path,
     click_xy: Optional[Tuple[int, int]] = None,
     color: str = "#FF0000",
-) -> str:
+) -> Tuple[str, str]:
     """Take a screenshot; when click_xy provided, overlay a visible marker at that point.
 
-    Returns a data URL string.
+    Returns a (media_type, b64) pair.
     """
     out_dir.mkdir(parents=True, exist_ok=True)
     ts_name = int(time.time() * 1000)
@@ -180,75 +255,192 @@ def take_screenshot_b64_marking(
     else:
         x, y = click_xy
         device.screenshot_with_marker(tmp, x, y, color=color)
-    return "data:image/png;base64," + encode_file_base64(tmp)
+    return _image_bytes_to_payload(tmp.read_bytes())
+
+
+def _adb_base_cmd(device: AndroidDevice) -> List[str]:
+    """Build the adb invocation prefix once; reused across all geometry probes."""
+    if getattr(device, "serial", None):
+        return [str(device.tools.adb), "-s", device.serial]
+    return [str(device.tools.adb)]
+
+
+def _build_http_session():
+    """Build one keep-alive HTTP client shared by every LLM turn.
+
+    HTTP/2 multiplexing is used when the h2 extra is installed; either way the
+    TLS handshake is paid once per run instead of once per turn.
+    """
+    try:
+        import httpx
+    except Exception:
+        return None
+    limits = httpx.Limits(max_keepalive_connections=8)
+    try:
+        return httpx.Client(http2=True, limits=limits, timeout=120)
+    except ImportError:
+        return httpx.Client(limits=limits, timeout=120)
+
+
+def _freeze(obj: Any) -> Any:
+    """Convert an action dict into a comparable tuple without JSON serialization."""
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _drain_stream(src, dst) -> None:
+    """Copy a subprocess stdout into a (possibly compressed) file object."""
+    try:
+        for chunk in iter(lambda: src.read(65536), b""):
+            dst.write(chunk)
+    except Exception:
+        pass
 
 
-def get_device_resolution(device: AndroidDevice) -> Tuple[int, int]:
+# Precompiled once and matched at the bytes level: the dumpsys outputs these
+# run over are tens of KB, re-parsed every geometry probe, and decoding them
+# to str is wasted work for ASCII numeric extraction.
+_RE_WM_SIZE = re.compile(rb":\s*(\d{3,5})\s*x\s*(\d{3,5})")
+_RE_ORIENT = re.compile(rb"SurfaceOrientation:\s*([0-3])")
+_RE_DISPLAY_WH = re.compile(
+    rb"(?:DisplayDeviceInfo|mBaseDisplayInfo|DisplayInfo|deviceProductInfo)[^\n]*?(\d{3,5})\s*x\s*(\d{3,5})"
+)
+_ROTATION_DEG = {b"0": 0, b"1": 90, b"2": 180, b"3": 270}
+
+
+def _parse_wm_size(out: bytes) -> Optional[Tuple[int, int]]:
+    # Expected: Physical size: 1080x2424
+    m = _RE_WM_SIZE.search(out)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    return None
+
+
+def _parse_rotation(out: bytes) -> int:
+    # e.g., "SurfaceOrientation: 1"
+    m = _RE_ORIENT.search(out)
+    if m:
+        return _ROTATION_DEG.get(m.group(1), 0)
+    return 0
+
+
+def _parse_display_size(out: bytes) -> Optional[Tuple[int, int]]:
+    candidates = [(int(w), int(h)) for w, h in _RE_DISPLAY_WH.findall(out)]
+    if candidates:
+        candidates.sort(key=lambda wh: wh[0] * wh[1], reverse=True)
+        return candidates[0]
+    return None
+
+
+def get_device_resolution(adb_base: List[str], env: Dict[str, str]) -> Tuple[int, int]:
     """Return (width,height) of the device in pixels using `wm size`.
 
     Fallback to (1440, 900) on failure.
     """
     try:
-        cmd = ([str(device.tools.adb), "-s", device.serial] if getattr(device, "serial", None) else [str(device.tools.adb)]) + ["shell", "wm", "size"]
-        cp = subprocess.run(cmd, env=device.env, capture_output=True)
-        out = (cp.stdout or b"").decode("utf-8", errors="ignore")
-        # Expected: Physical size: 1080x2424
-        for line in out.splitlines():
-            if ":" in line and "x" in line:
-                part = line.split(":", 1)[1].strip()
-                w_s, h_s = part.split("x")
-                return int(w_s), int(h_s)
+        cp = subprocess.run(adb_base + ["shell", "wm", "size"], env=env, capture_output=True)
+        size = _parse_wm_size(cp.stdout or b"")
+        if size:
+            return size
     except Exception:
         pass
     return 1440, 900
 
 
-def get_device_rotation_deg(device: AndroidDevice) -> int:
+def get_device_rotation_deg(adb_base: List[str], env: Dict[str, str]) -> int:
     """Return display rotation in degrees (0, 90, 180, 270).
 
     Uses `dumpsys input` SurfaceOrientation when available; falls back to 0.
     """
     try:
-        cmd = ([str(device.tools.adb), "-s", device.serial] if getattr(device, "serial", None) else [str(device.tools.adb)]) + ["shell", "dumpsys", "input"]
-        cp = subprocess.run(cmd, env=device.env, capture_output=True)
-        out = (cp.stdout or b"").decode("utf-8", errors="ignore")
-        for line in out.splitlines():
-            if "SurfaceOrientation" in line:
-                # e.g., "SurfaceOrientation: 1"
-                parts = line.strip().split(":")
-                if len(parts) == 2:
-                    val = parts[1].strip()
-                    if val.isdigit():
-                        mapping = {"0": 0, "1": 90, "2": 180, "3": 270}
-                        return mapping.get(val, 0)
+        cp = subprocess.run(adb_base + ["shell", "dumpsys", "input"], env=env, capture_output=True)
+        return _parse_rotation(cp.stdout or b"")
     except Exception:
         pass
     return 0
 
 
-def get_device_display_size(device: AndroidDevice) -> Optional[Tuple[int, int]]:
+def get_device_display_size(adb_base: List[str], env: Dict[str, str]) -> Optional[Tuple[int, int]]:
     """Try to read the active display size from `dumpsys display`.
 
     Returns (width, height) in pixels if detected, otherwise None.
     """
     try:
-        cmd = ([str(device.tools.adb), "-s", device.serial] if getattr(device, "serial", None) else [str(device.tools.adb)]) + ["shell", "dumpsys", "display"]
-        cp = subprocess.run(cmd, env=device.env, capture_output=True)
-        out = (cp.stdout or b"").decode("utf-8", errors="ignore")
-        candidates: List[Tuple[int, int]] = []
-        for line in out.splitlines():
-            if any(key in line for key in ("DisplayDeviceInfo", "mBaseDisplayInfo", "DisplayInfo", "deviceProductInfo")):
-                m = re.search(r"(\d{3,5})\s*x\s*(\d{3,5})", line)
-                if m:
-                    w, h = int(m.group(1)), int(m.group(2))
-                    candidates.append((w, h))
-        if candidates:
-            candidates.sort(key=lambda wh: wh[0] * wh[1], reverse=True)
-            return candidates[0]
+        cp = subprocess.run(adb_base + ["shell", "dumpsys", "display"], env=env, capture_output=True)
+        return _parse_display_size(cp.stdout or b"")
     except Exception:
         pass
     return None
 
+
+_GEOMETRY_SEP = "__SEP__"
+
+
+def get_device_geometry(
+    adb_base: List[str],
+    env: Dict[str, str],
+    session: Optional[AdbShellSession] = None,
+) -> Tuple[Tuple[int, int], int, Optional[Tuple[int, int]]]:
+    """Query resolution, rotation, and display size in one adb shell round-trip.
+
+    Uses the persistent shell session when provided (no subprocess spawn at
+    all), otherwise a one-shot `adb shell`. Returns ((phy_w, phy_h),
+    rotation_deg, display_size). Falls back to the three individual helpers
+    if the combined call fails.
+    """
+    try:
+        combined = f"wm size; echo {_GEOMETRY_SEP}; dumpsys input | grep SurfaceOrientation; echo {_GEOMETRY_SEP}; dumpsys display"
+        if session is not None:
+            _, raw = session.run(combined)
+        else:
+            cp = subprocess.run(adb_base + ["shell", combined], env=env, capture_output=True)
+            raw = cp.stdout or b""
+        sections = raw.split(_GEOMETRY_SEP.encode("ascii"))
+        if len(sections) == 3:
+            size = _parse_wm_size(sections[0])
+            if size:
+                return size, _parse_rotation(sections[1]), _parse_display_size(sections[2])
+    except Exception:
+        pass
+    return get_device_resolution(adb_base, env), get_device_rotation_deg(adb_base, env), get_device_display_size(adb_base, env)
+
+
+_DEVICE_RESOLUTION_CACHE: Dict[Optional[str], Tuple[int, int]] = {}
+_DISPLAY_SIZE_CACHE: Dict[Optional[str], Optional[Tuple[int, int]]] = {}
+
+
+def get_cached_device_geometry(
+    device: AndroidDevice,
+    adb_base: Optional[List[str]] = None,
+    session: Optional[AdbShellSession] = None,
+) -> Tuple[Tuple[int, int], int, Optional[Tuple[int, int]]]:
+    """Per-serial cached geometry; only rotation is re-polled once cached.
+
+    The emulator's physical resolution and display size never change within a
+    session, so their adb round-trips are only paid once per run.
+    """
+    if adb_base is None:
+        adb_base = _adb_base_cmd(device)
+    key = getattr(device, "serial", None)
+    if key in _DEVICE_RESOLUTION_CACHE:
+        if session is not None:
+            try:
+                _, raw = session.run("dumpsys input | grep SurfaceOrientation")
+                rotation = _parse_rotation(raw)
+            except Exception:
+                rotation = get_device_rotation_deg(adb_base, device.env)
+        else:
+            rotation = get_device_rotation_deg(adb_base, device.env)
+        return _DEVICE_RESOLUTION_CACHE[key], rotation, _DISPLAY_SIZE_CACHE.get(key)
+    size, rotation, display_size = get_device_geometry(adb_base, device.env, session)
+    _DEVICE_RESOLUTION_CACHE[key] = size
+    _DISPLAY_SIZE_CACHE[key] = display_size
+    return size, rotation, display_size
+
+
 def load_spec(path: Path) -> Dict[str, Any]:
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
@@ -281,7 +473,8 @@ def run_agent(test_json_path: Path) -> int:
     try:
         now_ts = str(int(time.time()))
         def _apply_placeholders(text: str) -> str:
-            return text.replace("{timestamp}", now_ts)
+            # Skip the scan entirely when no placeholder syntax is present.
+            return text.replace("{timestamp}", now_ts) if "{" in text else text
         goal = _apply_placeholders(goal)
         if suggestions_text:
             suggestions_text = _apply_placeholders(suggestions_text)
@@ -308,6 +501,11 @@ def run_agent(test_json_path: Path) -> int:
 
     device = AndroidDevice.connect()
     device.ensure_emulator_ready()
+    adb_base = _adb_base_cmd(device)
+    max_steps = MAX_AGENT_STEPS
+    # Persistent shell for metadata queries and key injection; avoids a fresh
+    # adb client spawn per command.
+    shell_session = AdbShellSession(adb_base, device.env)
 
     try:
         prepare_app(device, package, apk, activity, install_config)
@@ -319,17 +517,29 @@ def run_agent(test_json_path: Path) -> int:
         print("Executing pre-steps before agent loop...")
         pre_dir = report_root / "pre_steps"
         pre_dir.mkdir(parents=True, exist_ok=True)
+        # Commands stay sequential (ordering matters), but the per-step artifact
+        # screenshots are documentation only and can overlap the next command.
+        pre_pool = ThreadPoolExecutor(max_workers=2)
+        pre_shots: List[Future] = []
         for i, st in enumerate(pre_steps, start=1):
             print(f"Pre-step {i}: {st}")
             try:
                 cmd = st.get("cmd", "")
                 execute_command(device, st, package=package)
                 if cmd == "tap" and "x" in st and "y" in st:
-                    device.screenshot_with_marker(pre_dir / f"pre_{i:03d}_tap.png", int(st["x"]), int(st["y"]))
+                    pre_shots.append(pre_pool.submit(
+                        device.screenshot_with_marker, pre_dir / f"pre_{i:03d}_tap.png", int(st["x"]), int(st["y"]),
+                    ))
                 else:
-                    device.screenshot(pre_dir / f"pre_{i:03d}_{cmd}.png")
+                    pre_shots.append(pre_pool.submit(device.screenshot, pre_dir / f"pre_{i:03d}_{cmd}.png"))
             except Exception as exc:
                 print("Warning: pre-step failed:", exc)
+        for fut in pre_shots:
+            try:
+                fut.result(timeout=30)
+            except Exception as exc:
+                print("Warning: pre-step screenshot failed:", exc)
+        pre_pool.shutdown(wait=False)
 
     # Reports (continue with screenshots directory)
     scr_dir = report_root / "screenshots"
@@ -341,17 +551,26 @@ def run_agent(test_json_path: Path) -> int:
     remote_video_path = f"/sdcard/agent_session_{ts}.mp4"
     recorder = VideoRecorder(device, remote_video_path, video_path)
 
-    # Start device logcat capture
-    device_log_path = report_root / "device_log.txt"
+    # Start device logcat capture. Unfiltered logcat easily reaches 50-200 MB
+    # per session, so restrict it to the app pid at warning level when the pid
+    # resolves, and gzip the stream at write time either way.
+    device_log_path = report_root / "device_log.txt.gz"
     logcat_proc = None
     logcat_file = None
     try:
-        adb_cmd = [str(device.tools.adb)]
-        if getattr(device, "serial", None):
-            adb_cmd += ["-s", device.serial]
-        adb_cmd += ["logcat", "-v", "threadtime"]
-        logcat_file = open(device_log_path, "w", encoding="utf-8", errors="replace")
-        logcat_proc = subprocess.Popen(adb_cmd, stdout=logcat_file, stderr=subprocess.STDOUT, env=device.env)
+        app_pid = ""
+        try:
+            rc, out = shell_session.run(f"pidof {package}", timeout=5.0)
+            if rc == 0 and out.strip():
+                app_pid = out.split()[0].decode("ascii", errors="ignore")
+        except Exception:
+            app_pid = ""
+        adb_cmd = adb_base + ["logcat", "-v", "threadtime"]
+        if app_pid.isdigit():
+            adb_cmd += ["--pid", app_pid, "*:W"]
+        logcat_file = gzip.open(device_log_path, "wb", compresslevel=1)
+        logcat_proc = subprocess.Popen(adb_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=device.env)
+        threading.Thread(target=_drain_stream, args=(logcat_proc.stdout, logcat_file), daemon=True).start()
     except Exception:
         logcat_proc = None
         if logcat_file is not None:
@@ -359,7 +578,11 @@ def run_agent(test_json_path: Path) -> int:
             logcat_file = None
 
     provider_name = os.environ.get("LLM_PROVIDER", "openai").strip().lower() or "openai"
-    provider = create_provider(provider_name)
+    http_session = _build_http_session()
+    if http_session is not None:
+        provider = create_provider(provider_name, session=http_session)
+    else:
+        provider = create_provider(provider_name)
     system_prompt = build_system_prompt(provider_name)
     completion_rule = build_completion_rule(provider_name)
     # Summary and accumulators
@@ -386,6 +609,10 @@ def run_agent(test_json_path: Path) -> int:
             print(msg.encode("utf-8", errors="replace").decode("ascii", errors="replace"))
         step_logs.append(msg)
 
+    # Small pool used to overlap adb I/O (screenshot capture) with the
+    # wait-between-actions sleep; both are pure I/O.
+    io_pool = ThreadPoolExecutor(max_workers=3)
+
     try:
         recorder.start()
         log(f"[Agent] Screen recording started -> {remote_video_path}")
@@ -393,12 +620,16 @@ def run_agent(test_json_path: Path) -> int:
         global_turn_index = 0
         # Iterate each sub-step: all must pass
         for sub_idx, sub in enumerate(steps_spec, start=1):
-            # Prepare per-substep texts (apply timestamp placeholder)
+            # Prepare per-substep texts; compute the timestamp once and only
+            # substitute fields that actually contain placeholder syntax.
             now_ts = str(int(time.time()))
-            goal_text = str(sub.get("goal", "") or "").replace("{timestamp}", now_ts).strip()
-            suggestions_text = str(sub.get("suggestions", "") or "").replace("{timestamp}", now_ts).strip()
-            negative_prompt_text = str(sub.get("negative_prompt", "") or "").replace("{timestamp}", now_ts).strip()
-            success_criteria_text = str(sub.get("success_criteria", "") or "").replace("{timestamp}", now_ts).strip()
+            sub_texts: List[str] = []
+            for key in ("goal", "suggestions", "negative_prompt", "success_criteria"):
+                text = str(sub.get(key, "") or "").strip()
+                if "{" in text:
+                    text = text.replace("{timestamp}", now_ts)
+                sub_texts.append(text)
+            goal_text, suggestions_text, negative_prompt_text, success_criteria_text = sub_texts
 
             # Update summary first-step goal for compatibility
             if sub_idx == 1:
@@ -406,14 +637,14 @@ def run_agent(test_json_path: Path) -> int:
                 summary["negative_prompt"] = negative_prompt_text
 
             # Build persistent context for this sub-step and initial screenshot
-            initial_screenshot, current_input_w, current_input_h = take_screenshot_payload(device, scr_dir)
-            phy_w, phy_h = get_device_resolution(device)
-            rotation = get_device_rotation_deg(device)
+            initial_screenshot, current_input_w, current_input_h, last_frame_digest = take_screenshot_payload(device, scr_dir)
+            # Resolution and display size are stable within a session; rotation
+            # is polled once per substep instead of on every turn.
+            (phy_w, phy_h), rotation, display_size = get_cached_device_geometry(device, adb_base, shell_session)
             if rotation in (90, 270):
                 dev_w, dev_h = phy_h, phy_w
             else:
                 dev_w, dev_h = phy_w, phy_h
-            display_size = get_device_display_size(device)
             if current_input_w <= 0 or current_input_h <= 0:
                 current_input_w = display_size[0] if display_size else dev_w
                 current_input_h = display_size[1] if display_size else dev_h
@@ -445,23 +676,19 @@ def run_agent(test_json_path: Path) -> int:
             # Per-substep trackers
             finished = False
             explicit_success: Optional[bool] = None
-            last_sig: Optional[str] = None
+            last_sig: Optional[Tuple[Any, ...]] = None
             repeat_count: int = 0
             turns_this_sub = 0
+            current_screenshot_url = initial_screenshot
+            stale_streak = 0
+            pending_wait: Optional[Future] = None
 
-            while turns_this_sub < MAX_AGENT_STEPS and not finished:
+            while turns_this_sub < max_steps and not finished:
                 turns_this_sub += 1
                 global_turn_index += 1
                 log(f"[Agent] Substep {sub_idx} - Turn {turns_this_sub} (global {global_turn_index})")
-                phy_w, phy_h = get_device_resolution(device)
-                rotation = get_device_rotation_deg(device)
-                if rotation in (90, 270):
-                    dev_w, dev_h = phy_h, phy_w
-                else:
-                    dev_w, dev_h = phy_w, phy_h
                 log(f"[Agent] Screen: physical={phy_w}x{phy_h}, rotation={rotation}Â°, canvas={current_input_w}x{current_input_h}")
 
-                display_size = get_device_display_size(device)
                 turn_result = provider.create_turn(
                     input_messages,
                     display_width=current_input_w or (display_size[0] if display_size else dev_w),
@@ -472,12 +699,20 @@ def run_agent(test_json_path: Path) -> int:
                 try:
                     raw = turn_result.raw_response or {}
                     raw_path = raw_responses_dir / f"step_{global_turn_index:03d}_response_raw.json"
-                    with raw_path.open("w", encoding="utf-8") as f:
-                        json_str = raw.get("json_str") if isinstance(raw, dict) else None
-                        if json_str:
-                            f.write(json_str)
+                    json_str = raw.get("json_str") if isinstance(raw, dict) else None
+                    if json_str:
+                        payload = json_str.encode("utf-8")
+                    else:
+                        raw_dict = raw.get("dict", {}) if isinstance(raw, dict) else {}
+                        if orjson is not None:
+                            payload = orjson.dumps(raw_dict, option=orjson.OPT_INDENT_2)
                         else:
-                            json.dump(raw.get("dict", {}) if isinstance(raw, dict) else {}, f, indent=2)
+                            payload = json.dumps(raw_dict, indent=2).encode("utf-8")
+                    if lz4_frame is not None:
+                        with lz4_frame.open(raw_path.with_suffix(".json.lz4"), "wb") as f:
+                            f.write(payload)
+                    else:
+                        raw_path.write_bytes(payload)
                 except Exception:
                     pass
 
@@ -499,17 +734,24 @@ def run_agent(test_json_path: Path) -> int:
                     elif output_item.type == LLMOutputType.COMPUTER_ACTION:
                         action = output_item.action or {}
                         log(f"[Agent] Action: {action}")
-                        sig = json.dumps(action, sort_keys=True)
+                        sig = _freeze(action)
                         if sig == last_sig:
                             repeat_count += 1
                         else:
                             repeat_count = 0
                             last_sig = sig
 
+                        if pending_wait is not None:
+                            pending_wait.result()
+                            pending_wait = None
+
                         if repeat_count >= 10:
                             log("[Agent] Detected repeated action. Sending BACK to escape loop.")
-                            device.keyevent("4")
-                            device.wait(WAIT_BETWEEN_ACTIONS)
+                            try:
+                                shell_session.run("input keyevent 4")
+                            except Exception:
+                                device.keyevent("4")
+                            pending_wait = io_pool.submit(device.wait, WAIT_BETWEEN_ACTIONS)
                             repeat_count = 0
                         else:
                             if isinstance(action, dict) and action.get("type") in ("click", "double_click") and "x" in action and "y" in action:
@@ -517,7 +759,11 @@ def run_agent(test_json_path: Path) -> int:
                                     cx, cy = int(action.get("x")), int(action.get("y"))
                                     last_click_xy = (cx, cy)
                                     pre_marked = scr_dir / f"step_{global_turn_index:03d}_preclick_marked.png"
-                                    device.screenshot_with_marker(pre_marked, cx, cy)
+                                    # Mark the already-captured pre-action frame in-process;
+                                    # only fall back to a fresh screencap when no frame is cached.
+                                    cached_png = device.last_screenshot_bytes
+                                    if not (cached_png and save_marked_screenshot(cached_png, pre_marked, cx, cy)):
+                                        device.screenshot_with_marker(pre_marked, cx, cy)
                                     reason_text = last_reasoning_text or (produced_texts[-1] if produced_texts else "No reasoning from model")
                                     web_events.append({
                                         "index": global_turn_index,
@@ -539,7 +785,7 @@ def run_agent(test_json_path: Path) -> int:
                                 continue
                             actions_this_turn += 1
                             executed_any = True
-                            device.wait(WAIT_BETWEEN_ACTIONS)
+                            pending_wait = io_pool.submit(device.wait, WAIT_BETWEEN_ACTIONS)
 
                     elif output_item.type == LLMOutputType.END_TEST:
                         end_test_item = output_item
@@ -598,17 +844,49 @@ def run_agent(test_json_path: Path) -> int:
                     if pass_flag is not None:
                         log(f"[Agent] Substep {sub_idx} finished. success={pass_flag}")
                 else:
-                    next_screenshot, next_input_w, next_input_h = take_screenshot_payload(device, scr_dir)
-                    if next_input_w > 0 and next_input_h > 0:
-                        current_input_w, current_input_h = next_input_w, next_input_h
+                    # Capture the next frame concurrently with the trailing
+                    # wait-between-actions sleep of the last executed action.
+                    shot_future = io_pool.submit(device.screenshot_bytes)
+                    if pending_wait is not None:
+                        pending_wait.result()
+                        pending_wait = None
+                    png_bytes = shot_future.result()
+                    digest = _frame_digest(png_bytes)
+                    if digest == last_frame_digest:
+                        stale_streak += 1
+                    else:
+                        stale_streak = 0
+                        last_frame_digest = digest
+                    stale = stale_streak >= STALE_FRAME_THRESHOLD
+                    if stale and stale_streak % STALE_RESEND_EVERY != 0:
+                        # Identical frame: skip re-encoding/uploading the image and
+                        # nudge the model with text. The Claude provider carries the
+                        # note inside the tool_result when no image is attached;
+                        # OpenAI requires a screenshot per computer call, so the
+                        # cached previous data URL is reused there. Every
+                        # STALE_RESEND_EVERY stale turns a real frame goes up again.
+                        log(f"[Agent] Screen unchanged for {stale_streak + 1} frames; skipping screenshot upload.")
+                        stale_screenshot = None if provider_name == "claude" else current_screenshot_url
+                        state_note = "The screen has not changed since the previous screenshot. Try a different action to progress toward the goal."
+                        next_screenshot = stale_screenshot
+                    else:
+                        next_input_w, next_input_h = _read_image_size_from_bytes(png_bytes)
+                        if next_input_w > 0 and next_input_h > 0:
+                            current_input_w, current_input_h = next_input_w, next_input_h
+                        next_screenshot = _image_bytes_to_payload(png_bytes)
+                        current_screenshot_url = next_screenshot
+                        if stale:
+                            state_note = "The screen has still not changed; the current frame is attached again. Try a different action to progress toward the goal."
+                        else:
+                            state_note = ("State updated after actions. Continue toward the goal." if executed_any else
+                                          "No actions produced. Observe and continue toward the goal.")
                     input_messages = [
                         input_messages[0],
                         provider.format_user_message(
                             [
                                 base_user_context,
                                 f"Current screenshot size: {current_input_w}x{current_input_h}. Use coordinates in this pixel space.",
-                                ("State updated after actions. Continue toward the goal." if executed_any else
-                                 "No actions produced. Observe and continue toward the goal."),
+                                state_note,
                             ],
                             next_screenshot,
                         ),
@@ -656,6 +934,13 @@ def run_agent(test_json_path: Path) -> int:
                 logcat_file.close()
             except Exception:
                 pass
+        io_pool.shutdown(wait=False)
+        shell_session.close()
+        if http_session is not None:
+            try:
+                http_session.close()
+            except Exception:
+                pass
         teardown_app(device, package, install_config.uninstall_after)
         recorder.stop_and_pull()
 
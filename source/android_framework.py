@@ -11,12 +11,15 @@ All logs are printed in English. Comments are in English per repository rules.
 
 from __future__ import annotations
 
+import io
 import os
 import re
 import shlex
 import subprocess
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 
@@ -38,17 +41,41 @@ except Exception:
     Image = None
     ImageDraw = None
 
+# NumPy lets the click marker be stamped as one vectorized alpha blend over a
+# cached sprite instead of six PIL draw passes per frame.
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# adbutils speaks the adb server protocol over a socket, so one-shot
+# commands skip the adb client spawn entirely. Purely optional: every
+# call site falls back to the subprocess path when it is absent or fails.
+try:
+    import adbutils
+except Exception:
+    adbutils = None
+
+
+# Command echoing costs a shlex.quote walk per argument on every adb call;
+# opt in via ADB_TRACE=1 when debugging adb traffic.
+_VERBOSE = os.environ.get("ADB_TRACE") == "1"
 
-def _run(cmd: List[str], env: Dict[str, str], check: bool = True, capture: bool = True, input_text: Optional[bytes] = None) -> subprocess.CompletedProcess:
-    printable = " ".join([shlex.quote(str(c)) for c in cmd])
-    print(f"$ {printable}")
+
+def _run(cmd: List[str], env: Dict[str, str], check: bool = True, capture: bool = True, input_text: Optional[bytes] = None, quiet: bool = False) -> subprocess.CompletedProcess:
+    # quiet skips echoing the command and decoding/printing its output —
+    # polled queries (dumpsys, pm) produce tens of KB that nobody reads.
+    verbose = _VERBOSE and not quiet
+    if verbose:
+        printable = " ".join([shlex.quote(str(c)) for c in cmd])
+        print(f"$ {printable}")
     cp = subprocess.run(
         cmd,
         env=env,
         input=input_text,
         capture_output=capture,
     )
-    if capture:
+    if capture and verbose:
         if cp.stdout:
             try:
                 print(cp.stdout.decode("utf-8", errors="ignore"))
@@ -60,31 +87,289 @@ def _run(cmd: List[str], env: Dict[str, str], check: bool = True, capture: bool
             except Exception:
                 pass
     if check and cp.returncode != 0:
+        printable = " ".join([shlex.quote(str(c)) for c in cmd])
         raise RuntimeError(f"Command failed (exit {cp.returncode}): {printable}")
     return cp
 
 
-def _adb(env: Dict[str, str], tools: AndroidTools, args: List[str], check: bool = True, capture: bool = True, input_text: Optional[bytes] = None, serial: Optional[str] = None) -> subprocess.CompletedProcess:
+def _adb(env: Dict[str, str], tools: AndroidTools, args: List[str], check: bool = True, capture: bool = True, input_text: Optional[bytes] = None, serial: Optional[str] = None, quiet: bool = False) -> subprocess.CompletedProcess:
     base = [str(tools.adb)]
     if serial:
         base += ["-s", serial]
-    return _run(base + args, env=env, check=check, capture=capture, input_text=input_text)
+    return _run(base + args, env=env, check=check, capture=capture, input_text=input_text, quiet=quiet)
+
+
+# Keep alphanumerics and a small safe set; everything else breaks shell
+# parsing or `input text`. A str.translate table runs the substitution at
+# C level, noticeably faster than re.sub for long typed strings.
+_SAFE_TEXT_CHARS = frozenset(map(ord, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_%@.,:-"))
+_SANITIZE_TABLE = {i: (chr(i) if i in _SAFE_TEXT_CHARS else "_") for i in range(128)}
+# Resumed-activity line from `dumpsys activity activities`, polled 2x/s.
+# Bytes-level so the poll never decodes the full dumpsys output.
+_RESUMED_RE = re.compile(rb"ResumedActivity:.*? (\S+)/(\S+)")
 
 
 def _sanitize_text_for_adb_input(text: str) -> str:
     """Sanitize text for `adb shell input text`.
 
     Spaces must be replaced by %s. Some characters must be escaped or
-    are unsupported; replace with spaces as a conservative fallback.
+    are unsupported; replace with underscores as a conservative fallback.
+    """
+    # Clamp to ASCII first so the 128-entry table covers every code point.
+    text = text.encode("ascii", "replace").decode("ascii")
+    return text.replace(" ", "%s").translate(_SANITIZE_TABLE)
+
+
+def _draw_marker(draw: "ImageDraw.ImageDraw", x: int, y: int, r: int, outline_w: int, color: str) -> None:
+    """Issue the shadow + fill + outline passes for the click marker."""
+    shadow_w = outline_w + 4
+    bbox = (x - r, y - r, x + r, y + r)
+
+    # Shadow (white) for contrast
+    draw.ellipse(bbox, outline="#FFFFFF", width=shadow_w)
+    draw.line((x - r, y, x + r, y), fill="#FFFFFF", width=shadow_w)
+    draw.line((x, y - r, x, y + r), fill="#FFFFFF", width=shadow_w)
+
+    # Semi-transparent fill + red outline
+    fill_rgba = (255, 0, 0, 64)
+    draw.ellipse(bbox, fill=fill_rgba, outline=color, width=outline_w)
+    draw.line((x - r, y, x + r, y), fill=color, width=outline_w)
+    draw.line((x, y - r, x, y + r), fill=color, width=outline_w)
+
+
+def _marker_geometry(w: int, h: int) -> Tuple[int, int]:
+    """Dynamic marker size based on screen dimensions: (radius, outline width)."""
+    r = max(40, int(min(w, h) * 0.05))
+    return r, max(6, int(r * 0.18))
+
+
+# Pre-rendered marker sprites keyed by frame size and color; the geometry only
+# depends on (w, h), so every frame of a session reuses one sprite.
+_MARKER_SPRITE_CACHE: Dict[Tuple[int, int, str], Any] = {}
+
+
+def _marker_sprite(w: int, h: int, color: str) -> Any:
+    key = (w, h, color)
+    sprite = _MARKER_SPRITE_CACHE.get(key)
+    if sprite is None:
+        r, outline_w = _marker_geometry(w, h)
+        pad = outline_w + 4
+        half = r + pad
+        im = Image.new("RGBA", (2 * half, 2 * half), (0, 0, 0, 0))
+        _draw_marker(ImageDraw.Draw(im), half, half, r, outline_w, color)
+        sprite = np.asarray(im, dtype=np.uint8)
+        _MARKER_SPRITE_CACHE[key] = sprite
+    return sprite
+
+
+def save_marked_screenshot(png_bytes: bytes, out_path: Path, x: int, y: int, color: str = "#FF0000") -> bool:
+    """Draw the click marker onto existing PNG bytes and save to out_path.
+
+    Returns False when PIL is unavailable or drawing fails, so callers can
+    fall back to writing the unmarked frame.
+    """
+    if Image is None:
+        return False
+    try:
+        if np is not None:
+            # Stamp a cached sprite with one vectorized alpha blend over the
+            # ~(2r)^2 affected region instead of six PIL draw passes.
+            arr = np.array(Image.open(io.BytesIO(png_bytes)).convert("RGB"))
+            img_h, img_w = arr.shape[:2]
+            sprite = _marker_sprite(img_w, img_h, color)
+            half = sprite.shape[0] // 2
+            x0, y0 = max(0, x - half), max(0, y - half)
+            x1, y1 = min(img_w, x + half), min(img_h, y + half)
+            if x1 > x0 and y1 > y0:
+                sp = sprite[y0 - (y - half):y1 - (y - half), x0 - (x - half):x1 - (x - half)]
+                alpha = sp[:, :, 3:4].astype(np.float32) / 255.0
+                region = arr[y0:y1, x0:x1].astype(np.float32)
+                arr[y0:y1, x0:x1] = (region * (1.0 - alpha) + sp[:, :, :3].astype(np.float32) * alpha).astype(np.uint8)
+            Image.fromarray(arr).save(out_path, format="PNG", optimize=False, compress_level=1)
+            return True
+
+        base = Image.open(io.BytesIO(png_bytes)).convert("RGBA")
+        w, h = base.size
+        # Draw directly on the base in RGBA blend mode: the marker touches a
+        # ~(2r)^2 region, so a full-frame overlay + alpha_composite would blend
+        # millions of untouched pixels for nothing.
+        r, outline_w = _marker_geometry(w, h)
+        _draw_marker(ImageDraw.Draw(base, "RGBA"), x, y, r, outline_w, color)
+
+        # compress_level=1 is ~3x faster than PIL's default level 6 for a
+        # report artifact where size barely matters.
+        base.convert("RGB").save(out_path, format="PNG", optimize=False, compress_level=1)
+        return True
+    except Exception:
+        return False
+
+
+class AdbShellSession:
+    """Long-lived `adb shell` process reused across many commands.
+
+    Every one-shot `adb shell` pays client spawn + adb-server round-trip +
+    on-device shell fork (~50-200 ms). Feeding commands to a persistent shell
+    replaces all of that with a pipe write/read. Output is delimited by a
+    sentinel echo that also carries the command's exit status.
     """
 
-    # Replace spaces
-    text = text.replace(" ", "%s")
-    # Replace characters that break shell parsing or input
-    # Keep alphanumerics and a small safe set.
-    safe = re.compile(r"[^A-Za-z0-9_%@.,:\-]")
-    text = safe.sub("_", text)
-    return text
+    def __init__(self, adb_base: List[str], env: Dict[str, str]):
+        self._adb_base = list(adb_base)
+        self._env = env
+        self._proc: Optional[subprocess.Popen] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _ensure_proc(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                self._adb_base + ["shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=self._env,
+                bufsize=0,
+            )
+        return self._proc
+
+    def run(self, cmd: str, timeout: float = 15.0) -> Tuple[int, bytes]:
+        """Execute a shell command in the session; return (exit_code, output bytes).
+
+        Raises RuntimeError if the session dies or the deadline is exceeded.
+        """
+        with self._lock:
+            proc = self._ensure_proc()
+            self._seq += 1
+            sentinel = f"__DONE_{self._seq}__".encode("ascii")
+            proc.stdin.write(cmd.encode("utf-8") + b"; echo " + sentinel + b" $?\n")
+            proc.stdin.flush()
+            out = bytearray()
+            deadline = time.monotonic() + timeout
+            while True:
+                line = proc.stdout.readline()
+                if not line:
+                    self.close()
+                    raise RuntimeError("adb shell session closed unexpectedly")
+                idx = line.find(sentinel)
+                if idx != -1:
+                    out += line[:idx]
+                    status = line[idx + len(sentinel):].strip()
+                    try:
+                        code = int(status)
+                    except ValueError:
+                        code = 0
+                    return code, bytes(out)
+                out += line
+                if time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f"adb shell session command timed out: {cmd}")
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+
+
+# Tiny on-device loop that dispatches newline-delimited input events, so the
+# host pays one pipe write per event instead of one adb round-trip. The
+# `input` binary still forks per event on-device; keeping a JVM resident via
+# app_process is not portable across the emulator images this project targets.
+_INPUT_DAEMON_SCRIPT = """\
+#!/system/bin/sh
+while read cmd a1 a2 a3 a4 a5; do
+  case "$cmd" in
+    TAP) input tap "$a1" "$a2" ;;
+    SWIPE) input swipe "$a1" "$a2" "$a3" "$a4" "$a5" ;;
+    KEY) input keyevent "$a1" ;;
+    TEXT) input text "$a1" ;;
+    QUIT) exit 0 ;;
+  esac
+  echo __OK__
+done
+"""
+
+_INPUT_DAEMON_REMOTE = "/data/local/tmp/input_daemon.sh"
+
+
+class InputDaemon:
+    """Streams input events to a long-lived on-device dispatch loop."""
+
+    def __init__(self, adb_base: List[str], env: Dict[str, str]):
+        self._adb_base = list(adb_base)
+        self._env = env
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        try:
+            self._proc = subprocess.Popen(
+                self._adb_base + ["shell", "sh", _INPUT_DAEMON_REMOTE],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=self._env,
+                bufsize=0,
+            )
+            return True
+        except Exception:
+            self._proc = None
+            return False
+
+    def send(self, line: str, timeout: float = 10.0) -> bool:
+        """Dispatch one event line; True when the loop acknowledged it."""
+        with self._lock:
+            proc = self._proc
+            if proc is None or proc.poll() is not None:
+                return False
+            try:
+                proc.stdin.write(line.encode("ascii") + b"\n")
+                proc.stdin.flush()
+                deadline = time.monotonic() + timeout
+                while True:
+                    out_line = proc.stdout.readline()
+                    if not out_line:
+                        return False
+                    if b"__OK__" in out_line:
+                        return True
+                    if time.monotonic() > deadline:
+                        return False
+            except Exception:
+                return False
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            try:
+                proc.stdin.write(b"QUIT\n")
+                proc.stdin.flush()
+            except Exception:
+                pass
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+
+
+# Environment keys adb actually needs; everything else only bloats the env
+# block copied into each spawn.
+_ADB_ENV_KEYS = frozenset({
+    "PATH",
+    "ANDROID_HOME",
+    "ANDROID_SDK_ROOT",
+    "ANDROID_AVD_HOME",
+    "JAVA_HOME",
+    "HOME",
+    "USERPROFILE",
+    "SYSTEMROOT",
+    "SYSTEMDRIVE",
+    "COMSPEC",
+    "TEMP",
+    "TMP",
+    "LOCALAPPDATA",
+})
 
 
 @dataclass
@@ -92,43 +377,196 @@ class AndroidDevice:
     tools: AndroidTools
     env: Dict[str, str]
     serial: Optional[str] = None
+    # Most recent raw PNG from screenshot_bytes; lets callers draw markers
+    # in-process instead of taking a second device screenshot.
+    last_screenshot_bytes: Optional[bytes] = None
+    # Trimmed environment for adb client spawns: the full env block is copied
+    # into every subprocess (serialized as one buffer on Windows), and adb
+    # only needs a handful of keys. Emulator lifecycle keeps the full env.
+    env_minimal: Optional[Dict[str, str]] = None
+    # Lazily created persistent shell shared by all input/query commands.
+    _shell_session: Optional[AdbShellSession] = field(default=None, repr=False, compare=False)
+    # Optional on-device input loop; input falls back to the shell when absent.
+    _input_daemon: Optional[InputDaemon] = field(default=None, repr=False, compare=False)
+    # Short-TTL cache for serial selection plus per-serial AVD name memo;
+    # `adb devices` and `adb emu avd name` are expensive to re-shell per call.
+    _serial_cache: Tuple[float, Optional[str], Optional[str]] = field(default=(0.0, None, None), repr=False, compare=False)
+    _avd_name_cache: Dict[str, Optional[str]] = field(default_factory=dict, repr=False, compare=False)
+    # Optional adbutils device handle; None means subprocess adb everywhere.
+    _adb_client: Any = field(default=None, repr=False, compare=False)
 
     @classmethod
     def connect(cls) -> "AndroidDevice":
         tools = locate_android_tools()
         env = build_env(tools)
         device = cls(tools=tools, env=env, serial=None)
+        device.env_minimal = {k: v for k, v in env.items() if k in _ADB_ENV_KEYS}
         device.serial = device._select_preferred_serial()
+        device.start_persistent_shell()
+        device._connect_adbutils()
         return device
 
+    @property
+    def adb_env(self) -> Dict[str, str]:
+        return self.env_minimal or self.env
+
+    # ---------- Persistent shell ----------
+
+    def _session(self) -> AdbShellSession:
+        if self._shell_session is None:
+            base = [str(self.tools.adb)]
+            if self.serial:
+                base += ["-s", self.serial]
+            self._shell_session = AdbShellSession(base, self.adb_env)
+        return self._shell_session
+
+    def start_persistent_shell(self) -> None:
+        """Eagerly open the persistent shell session; best-effort.
+
+        Without this the first real command pays the session spawn; with no
+        device attached the failure is swallowed and _shell falls back to
+        one-shot invocations as before.
+        """
+        try:
+            self._session()
+        except Exception:
+            self._shell_session = None
+
+    def _connect_adbutils(self) -> None:
+        """Open an adb-server socket handle for the selected device; best-effort.
+
+        One-shot commands then go over the socket instead of spawning an adb
+        client per call. Any failure leaves the subprocess path in place.
+        """
+        if adbutils is None:
+            return
+        try:
+            self._adb_client = adbutils.adb.device(serial=self.serial)
+        except Exception:
+            self._adb_client = None
+
+    def _reset_shell_session(self) -> None:
+        """Drop the persistent shell (e.g. after the serial changes)."""
+        if self._shell_session is not None:
+            self._shell_session.close()
+            self._shell_session = None
+
+    def close(self) -> None:
+        """Release the persistent shell and input daemon at end of run."""
+        self._reset_shell_session()
+        if self._input_daemon is not None:
+            self._input_daemon.close()
+            self._input_daemon = None
+
+    def _start_input_daemon(self) -> None:
+        """Push and launch the on-device input loop; best-effort."""
+        if self._input_daemon is not None:
+            self._input_daemon.close()
+            self._input_daemon = None
+        try:
+            import tempfile
+            with tempfile.NamedTemporaryFile("w", suffix=".sh", delete=False, newline="\n") as tf:
+                tf.write(_INPUT_DAEMON_SCRIPT)
+                local = tf.name
+            try:
+                _adb(self.adb_env, self.tools, ["push", local, _INPUT_DAEMON_REMOTE], check=False, serial=self.serial, quiet=True)
+            finally:
+                os.unlink(local)
+            base = [str(self.tools.adb)] + (["-s", self.serial] if self.serial else [])
+            daemon = InputDaemon(base, self.adb_env)
+            if daemon.start():
+                self._input_daemon = daemon
+        except Exception:
+            self._input_daemon = None
+
+    def _send_input(self, line: str) -> bool:
+        """Try the input daemon; drop it on failure so callers fall back."""
+        daemon = self._input_daemon
+        if daemon is None:
+            return False
+        if daemon.send(line):
+            return True
+        daemon.close()
+        self._input_daemon = None
+        return False
+
+    def _adb_exec_out(self, args: List[str], timeout: int = 15) -> subprocess.CompletedProcess:
+        """Run a one-shot command via `adb exec-out`.
+
+        Unlike `adb shell`, exec-out skips the PTY: no CRLF translation and
+        raw stdout bytes, which matters for screencap and large dumpsys output.
+        """
+        cmd = [str(self.tools.adb)]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        return subprocess.run(cmd + ["exec-out"] + args, env=self.adb_env, capture_output=True, timeout=timeout)
+
+    def _shell(self, cmd: str) -> bytes:
+        """Run a shell command, preferring the persistent session.
+
+        A one-shot `adb shell` pays client spawn + on-device shell fork per
+        command; the session amortizes that across the run. Falls back to a
+        one-shot exec-out when the session pipe breaks.
+        """
+        try:
+            _, out = self._session().run(cmd)
+            return out
+        except Exception:
+            self._reset_shell_session()
+            client = self._adb_client
+            if client is not None:
+                try:
+                    return client.shell(cmd, encoding=None) or b""
+                except Exception:
+                    self._adb_client = None
+            cp = self._adb_exec_out([cmd])
+            return cp.stdout or b""
+
     # ---------- AVD helpers ----------
 
     def _query_avd_name(self, serial: str) -> Optional[str]:
         """Return the AVD name for a running emulator serial, or None."""
+        if serial in self._avd_name_cache:
+            return self._avd_name_cache[serial]
         try:
-            cp = _adb(self.env, self.tools, ["emu", "avd", "name"], check=False, serial=serial)
-            out = (cp.stdout or b"").decode("utf-8", errors="ignore").strip()
-            lines = [ln.strip() for ln in out.splitlines() if ln.strip()]
-            return lines[-1] if lines else None
+            cp = _adb(self.adb_env, self.tools, ["emu", "avd", "name"], check=False, serial=serial, quiet=True)
+            lines = [ln.strip() for ln in (cp.stdout or b"").splitlines() if ln.strip()]
+            name = lines[-1].decode("utf-8", errors="ignore") if lines else None
         except Exception:
             return None
+        self._avd_name_cache[serial] = name
+        return name
 
     def _select_preferred_serial(self, prefer_name: Optional[str] = None) -> Optional[str]:
         """Pick the best running emulator serial.
 
         Prefers an emulator whose AVD name matches prefer_name (or "ai_device"
-        by default). Falls back to the first online emulator.
+        by default). Falls back to the first online emulator. Results are
+        cached for a couple of seconds since connect/ensure/restart call this
+        back-to-back.
         """
+        cached_ts, cached_prefer, cached_serial = self._serial_cache
+        if cached_prefer == prefer_name and time.monotonic() - cached_ts < 2.0:
+            return cached_serial
         devices = list_adb_devices(self.tools, self.env)
         emulator_serials = [s for (s, st) in devices if s.startswith("emulator-") and st == "device"]
         preferred_names = {"ai device", "ai_device"}
         if prefer_name:
             preferred_names.add(prefer_name.lower().replace(" ", "_"))
-        for s in emulator_serials:
-            name = self._query_avd_name(s)
+        selected = emulator_serials[0] if emulator_serials else None
+        if len(emulator_serials) > 1:
+            # adb handles concurrent clients, so probe every emulator at once:
+            # discovery costs one round trip instead of one per device.
+            with ThreadPoolExecutor(max_workers=len(emulator_serials)) as ex:
+                names = list(ex.map(self._query_avd_name, emulator_serials))
+        else:
+            names = [self._query_avd_name(s) for s in emulator_serials]
+        for s, name in zip(emulator_serials, names):
             if name and name.lower().replace(" ", "_") in preferred_names:
-                return s
-        return emulator_serials[0] if emulator_serials else None
+                selected = s
+                break
+        self._serial_cache = (time.monotonic(), prefer_name, selected)
+        return selected
 
     # ---------- Device readiness ----------
 
@@ -138,7 +576,10 @@ class AndroidDevice:
         selected = self._select_preferred_serial()
         if selected:
             print("An emulator is already running.")
-            self.serial = selected
+            if selected != self.serial:
+                self.serial = selected
+                self._reset_shell_session()
+            self._start_input_daemon()
             return
 
         avds = list_avds(self.tools, self.env)
@@ -167,7 +608,10 @@ class AndroidDevice:
                     selected = ser
             except Exception:
                 pass
-        self.serial = self.serial or selected
+        if self.serial is None and selected:
+            self.serial = selected
+            self._reset_shell_session()
+        self._start_input_daemon()
 
     # ---------- App lifecycle ----------
 
@@ -179,7 +623,7 @@ class AndroidDevice:
             args.append("-t")
         args.append(str(apk_path))
         # First try without raising to inspect the error output
-        cp = _adb(self.env, self.tools, args, check=False, serial=self.serial)
+        cp = _adb(self.adb_env, self.tools, args, check=False, serial=self.serial)
         if cp.returncode == 0:
             return
         stderr = (cp.stderr or b"").decode("utf-8", errors="ignore")
@@ -206,7 +650,7 @@ class AndroidDevice:
                 partition_size_mb = 2047
             self.restart_emulator(wipe_data=True, partition_size_mb=partition_size_mb)
             # Retry once
-            cp2 = _adb(self.env, self.tools, args, check=False, serial=self.serial)
+            cp2 = _adb(self.adb_env, self.tools, args, check=False, serial=self.serial)
             if cp2.returncode == 0:
                 return
             stderr2 = (cp2.stderr or b"").decode("utf-8", errors="ignore")
@@ -237,60 +681,69 @@ class AndroidDevice:
         if target is None:
             target = avds[0]
         print(f"Starting emulator: {target} (wipe_data={wipe_data}, partition_size_mb={partition_size_mb})")
+        # The old emulator is gone; drop cached serial/AVD lookups.
+        self._serial_cache = (0.0, None, None)
+        self._avd_name_cache.clear()
         start_emulator(self.tools, self.env, target, wipe_data=wipe_data, partition_size_mb=partition_size_mb)
         wait_for_boot(self.tools, self.env)
         print("Emulator is ready.")
         selected = self._select_preferred_serial(prefer_name=target)
         self.serial = selected or self.serial
+        self._reset_shell_session()
+        self._start_input_daemon()
 
     def uninstall(self, package: str, keep_data: bool = False) -> None:
         args = ["uninstall"]
         if keep_data:
             args.append("-k")
         args.append(package)
-        _adb(self.env, self.tools, args, check=False, serial=self.serial)
+        _adb(self.adb_env, self.tools, args, check=False, serial=self.serial)
 
     def is_package_installed(self, package: str) -> bool:
-        """Return True if the package is present on the device."""
+        """Return True if the package is present on the device.
+
+        `pm path` is an exact match (unlike `pm list packages`, which matches
+        substrings) and needs no parsing: it prints `package:<apk path>` only
+        when installed.
+        """
         try:
-            cp = _adb(self.env, self.tools, ["shell", "pm", "list", "packages", package], check=False, serial=self.serial)
-            out = (cp.stdout or b"").decode("utf-8", errors="ignore")
-            # Lines look like: package:com.example.app
-            for line in out.splitlines():
-                line = line.strip()
-                if line.startswith("package:") and line.endswith(package):
-                    return True
+            return b"package:" in self._shell(f"pm path {package}")
         except Exception:
-            pass
-        return False
+            return False
 
     def launch_app(self, package: str, activity: Optional[str] = None) -> None:
         if activity:
             comp = activity if "/" in activity else f"{package}/{activity}"
-            _adb(self.env, self.tools, ["shell", "am", "start", "-n", comp], serial=self.serial)
+            _adb(self.adb_env, self.tools, ["shell", "am", "start", "-n", comp], serial=self.serial)
         else:
             # Fallback: monkey to trigger launcher activity
-            _adb(self.env, self.tools, ["shell", "monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1"], serial=self.serial)
+            _adb(self.adb_env, self.tools, ["shell", "monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1"], serial=self.serial)
 
     def stop_app(self, package: str) -> None:
-        _adb(self.env, self.tools, ["shell", "am", "force-stop", package], serial=self.serial)
+        self._shell(f"am force-stop {package}")
+
+    def shell_batch(self, cmds: List[str]) -> bytes:
+        """Run several shell commands in a single adb round-trip."""
+        return self._shell(" ; ".join(cmds))
 
     # ---------- Input interactions ----------
 
     def tap(self, x: int, y: int) -> None:
-        _adb(self.env, self.tools, ["shell", "input", "tap", str(x), str(y)], serial=self.serial)
+        if not self._send_input(f"TAP {x} {y}"):
+            self._shell(f"input tap {x} {y}")
 
     def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int = 300) -> None:
-        _adb(self.env, self.tools, [
-            "shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2), str(duration_ms)
-        ], serial=self.serial)
+        if not self._send_input(f"SWIPE {x1} {y1} {x2} {y2} {duration_ms}"):
+            self._shell(f"input swipe {x1} {y1} {x2} {y2} {duration_ms}")
 
     def input_text(self, text: str) -> None:
         sanitized = _sanitize_text_for_adb_input(text)
-        _adb(self.env, self.tools, ["shell", "input", "text", sanitized], serial=self.serial)
+        if not self._send_input(f"TEXT {sanitized}"):
+            self._shell(f"input text {sanitized}")
 
     def keyevent(self, name_or_code: str) -> None:
-        _adb(self.env, self.tools, ["shell", "input", "keyevent", str(name_or_code)], serial=self.serial)
+        if not self._send_input(f"KEY {name_or_code}"):
+            self._shell(f"input keyevent {name_or_code}")
 
     def back(self) -> None:
         self.keyevent("4")
@@ -306,75 +759,80 @@ class AndroidDevice:
     def wait_activity(self, package: str, activity: Optional[str] = None, timeout_sec: int = 30) -> None:
         """Poll the resumed activity until it matches the package/activity."""
 
-        end = time.time() + timeout_sec
+        # monotonic deadline: immune to wall-clock jumps during long runs
+        end = time.monotonic() + timeout_sec
         expected = None
         if activity:
             expected = activity if "/" in activity else f"{package}/{activity}"
-        while time.time() < end:
-            cp = _adb(self.env, self.tools, ["shell", "dumpsys", "activity", "activities"], check=False)
-            out = (cp.stdout or b"").decode("utf-8", errors="ignore")
+        # Exponential backoff: most launches resume in <2 s, so start polling
+        # fast and back off toward the old 500 ms cadence for slow ones.
+        delay = 0.05
+        while time.monotonic() < end:
+            # grep on-device so only the one relevant line crosses the adb channel
+            out = self._shell("dumpsys activity activities | grep ResumedActivity")
             # Look for a line like: ResumedActivity: ... package/.Activity
-            m = re.search(r"ResumedActivity:.*? (\S+)/(\S+)", out)
+            m = _RESUMED_RE.search(out)
             if m:
-                comp = f"{m.group(1)}/{m.group(2)}"
+                # Decode only the two captured groups, not the whole output
+                comp = f"{m.group(1).decode('utf-8', 'ignore')}/{m.group(2).decode('utf-8', 'ignore')}"
                 if expected is None and comp.startswith(package + "/"):
                     return
                 if expected is not None and comp == expected:
                     return
-            time.sleep(0.5)
+            time.sleep(delay)
+            delay = min(0.5, delay * 1.5)
         raise TimeoutError("Timed out waiting for target activity to be resumed")
 
     # ---------- Artifacts ----------
 
-    def screenshot(self, out_path: Path) -> None:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        cp = subprocess.run(
-            ([str(self.tools.adb), "-s", self.serial] if self.serial else [str(self.tools.adb)]) + ["exec-out", "screencap", "-p"],
-            env=self.env,
-            capture_output=True,
-            timeout=15,
-        )
+    def screenshot_bytes(self) -> bytes:
+        """Capture a screenshot and return the raw PNG bytes without touching disk."""
+        client = self._adb_client
+        if client is not None:
+            try:
+                # Only trust the socket payload when it is an intact PNG;
+                # devices whose shell service mangles newlines fall through.
+                data = client.shell("screencap -p", encoding=None)
+                if data and data.startswith(b"\x89PNG"):
+                    self.last_screenshot_bytes = data
+                    return data
+            except Exception:
+                self._adb_client = None
+        cp = self._adb_exec_out(["screencap", "-p"])
         if cp.returncode != 0:
             raise RuntimeError("Failed to take screenshot")
-        with out_path.open("wb") as f:
-            f.write(cp.stdout)
+        self.last_screenshot_bytes = cp.stdout
+        return cp.stdout
 
-    def screenshot_with_marker(self, out_path: Path, x: int, y: int, color: str = "#FF0000") -> None:
-        """Take a screenshot and overlay a highly visible marker at (x, y)."""
-        try:
-            self.screenshot(out_path)
-        except Exception:
-            # If capture fails (device busy/disconnecting), skip silently
-            return
-        if Image is None:
-            return
-        try:
-            base = Image.open(out_path).convert("RGBA")
-            w, h = base.size
-            overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay)
-
-            # Dynamic size based on screen dimensions
-            r = max(40, int(min(w, h) * 0.05))
-            outline_w = max(6, int(r * 0.18))
-            shadow_w = outline_w + 4
-
-            # Shadow (white) for contrast
-            bbox = (x - r, y - r, x + r, y + r)
-            draw.ellipse(bbox, outline="#FFFFFF", width=shadow_w)
-            draw.line((x - r, y, x + r, y), fill="#FFFFFF", width=shadow_w)
-            draw.line((x, y - r, x, y + r), fill="#FFFFFF", width=shadow_w)
-
-            # Semi-transparent fill + red outline
-            fill_rgba = (255, 0, 0, 64)
-            draw.ellipse(bbox, fill=fill_rgba, outline=color, width=outline_w)
-            draw.line((x - r, y, x + r, y), fill=color, width=outline_w)
-            draw.line((x, y - r, x, y + r), fill=color, width=outline_w)
-
-            # Composite overlay
-            result = Image.alpha_composite(base, overlay).convert("RGB")
-            result.save(out_path)
-        except Exception:
-            pass
+    def screenshot(self, out_path: Path) -> None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.screenshot_bytes()
+        with out_path.open("wb") as f:
+            f.write(data)
+
+    def screenshot_with_marker(
+        self,
+        out_path: Path,
+        x: int,
+        y: int,
+        color: str = "#FF0000",
+        png_bytes: Optional[bytes] = None,
+    ) -> None:
+        """Take a screenshot and overlay a highly visible marker at (x, y).
+
+        Pass ``png_bytes`` to reuse an already-captured frame and skip the
+        device round-trip entirely.
+        """
+        data = png_bytes
+        if data is None:
+            try:
+                data = self.screenshot_bytes()
+            except Exception:
+                # If capture fails (device busy/disconnecting), skip silently
+                return
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if not save_marked_screenshot(data, out_path, x, y, color):
+            with out_path.open("wb") as f:
+                f.write(data)
 
 
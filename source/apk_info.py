@@ -20,30 +20,53 @@ from typing import Optional
 from .emulator_setup import locate_android_tools
 
 
+# Bytes-level: aapt output is often 50+ KB and decoding it all just to run
+# two searches is wasted work — both lines appear near the top.
+_PKG_RE = re.compile(rb"package: name='([^']+)'")
+_ACT_RE = re.compile(rb"launchable-activity: name='([^']+)'")
+_BADGING_HEAD = 8192
+
+
+# aapt only ever lives under build-tools/<version>/, so a bounded walk
+# replaces four recursive sweeps of the whole SDK tree.
+_AAPT_CACHE: dict[Path, Path] = {}
+
+
 def find_aapt_path(sdk_root: Path) -> Optional[Path]:
-    for exe in ("aapt.exe", "aapt2.exe", "aapt", "aapt2"):
-        for p in sdk_root.rglob(exe):
+    cached = _AAPT_CACHE.get(sdk_root)
+    if cached is not None:
+        return cached
+    build_tools = sdk_root / "build-tools"
+    try:
+        versions = sorted(build_tools.iterdir(), reverse=True)
+    except OSError:
+        versions = []
+    for bt in versions:
+        for exe in ("aapt.exe", "aapt2.exe", "aapt", "aapt2"):
+            p = bt / exe
             if p.is_file():
+                _AAPT_CACHE[sdk_root] = p
                 return p
     return None
 
 
-def dump_badging(aapt_path: Path, apk_path: Path) -> str:
+def dump_badging(aapt_path: Path, apk_path: Path) -> bytes:
     cp = subprocess.run([str(aapt_path), "dump", "badging", str(apk_path)], capture_output=True)
     if cp.returncode != 0:
         raise RuntimeError(cp.stderr.decode("utf-8", errors="ignore") or "aapt dump badging failed")
-    return cp.stdout.decode("utf-8", errors="ignore")
+    return cp.stdout
 
 
-def parse_package_and_activity(badging: str) -> tuple[Optional[str], Optional[str]]:
+def parse_package_and_activity(badging: bytes) -> tuple[Optional[str], Optional[str]]:
     pkg = None
     act = None
-    m = re.search(r"package: name='([^']+)'", badging)
+    head = badging[:_BADGING_HEAD]
+    m = _PKG_RE.search(head)
     if m:
-        pkg = m.group(1)
-    m2 = re.search(r"launchable-activity: name='([^']+)'", badging)
+        pkg = m.group(1).decode("utf-8", errors="ignore")
+    m2 = _ACT_RE.search(head)
     if m2:
-        act = m2.group(1)
+        act = m2.group(1).decode("utf-8", errors="ignore")
     return pkg, act
 
 
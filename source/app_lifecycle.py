@@ -6,6 +6,7 @@ agent_runner and test_runner into reusable functions.
 
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -35,22 +36,82 @@ def prepare_app(
     """
     if config.skip_install:
         print("Skipping APK installation (skip_install/skip_stall=true). Assuming it is already on device.")
-        if not device.is_package_installed(package):
+        launch_cmd = _build_launch_cmd(package, activity)
+        # Installed-check, force-stop, and launch in one adb round-trip;
+        # force-stop/launch are harmless no-ops when the package is missing.
+        cmds = [f"pm path {package}", f"am force-stop {package}"]
+        if launch_cmd:
+            cmds.append(launch_cmd)
+        out = device.shell_batch(cmds)
+        if b"package:" not in out:
             raise RuntimeError(f"Package not installed on device: {package} (skip_install/skip_stall=true)")
-    else:
-        if device.is_package_installed(package):
-            print("Package already installed, uninstalling:", package)
-            device.uninstall(package)
+        return
+
+    asyncio.run(prepare_app_async(device, package, apk, activity, config))
+
+
+async def prepare_app_async(
+    device: AndroidDevice,
+    package: str,
+    apk: Optional[Path],
+    activity: Optional[str],
+    config: InstallConfig,
+) -> None:
+    """Install and launch, overlapping the APK transfer with activity discovery.
+
+    The install rides the adb channel while aapt badging runs on the host, so
+    the ~1-3 s activity lookup is hidden behind the transfer.
+    """
+    if config.skip_install:
+        prepare_app(device, package, apk, activity, config)
+        return
+
+    def _install() -> None:
+        # pm uninstall no-ops cheaply when the package is absent, so skip the
+        # separate installed probe.
+        print("Uninstalling any previous install:", package)
+        device.uninstall(package)
         print("Installing APK:", apk)
         device.install_apk(apk)  # type: ignore[arg-type]
 
-    try:
-        print("Force-stopping app before launch:", package)
-        device.stop_app(package)
-    except Exception:
-        pass
-    if activity or package:
-        device.launch_app(package, activity)
+    def _discover_activity() -> Optional[str]:
+        if activity or apk is None:
+            return activity
+        try:
+            from .apk_info import dump_badging, find_aapt_path, parse_package_and_activity
+            aapt = find_aapt_path(device.tools.sdk_root)
+            if aapt is None:
+                return None
+            _, discovered = parse_package_and_activity(dump_badging(aapt, apk))
+            return discovered
+        except Exception:
+            return None
+
+    _, resolved_activity = await asyncio.gather(
+        asyncio.to_thread(_install),
+        asyncio.to_thread(_discover_activity),
+    )
+
+    print("Force-stopping app before launch:", package)
+    launch_cmd = _build_launch_cmd(package, resolved_activity)
+    if launch_cmd:
+        # Force-stop and launch in one adb round-trip
+        device.shell_batch([f"am force-stop {package}", launch_cmd])
+    else:
+        try:
+            device.stop_app(package)
+        except Exception:
+            pass
+
+
+def _build_launch_cmd(package: str, activity: Optional[str]) -> Optional[str]:
+    if activity:
+        comp = activity if "/" in activity else f"{package}/{activity}"
+        return f"am start -n {comp}"
+    if package:
+        # Fallback: monkey to trigger launcher activity
+        return f"monkey -p {package} -c android.intent.category.LAUNCHER 1"
+    return None
 
 
 def teardown_app(device: AndroidDevice, package: str, uninstall: bool) -> None:
@@ -63,3 +124,7 @@ def teardown_app(device: AndroidDevice, package: str, uninstall: bool) -> None:
             pass
     else:
         print("Keeping app installed (uninstall_after=false).")
+    try:
+        device.close()
+    except Exception:
+        pass
@@ -15,22 +15,32 @@ Output:
 
 from __future__ import annotations
 
+import functools
 import json
 import os
+import re
 import shlex
 import subprocess
 import sys
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 
 # ---------------------------- Defaults ----------------------------
 
-DEFAULT_PROGRAM_FILES = Path(os.environ.get("ProgramFiles", r"C:\\Program Files")).resolve()
 DEFAULT_AVD_NAME = "UnityTestAVD"
 
+
+# Resolved lazily: CI paths never touch Program Files, and resolve() at
+# import time costs a filesystem round trip nobody asked for.
+@functools.cache
+def _program_files() -> Path:
+    return Path(os.environ.get("ProgramFiles", r"C:\\Program Files")).resolve()
+
+
 # These images are attempted in order until one can be installed/created.
 SYSTEM_IMAGE_CANDIDATES = [
     "system-images;android-34;google_apis;x86_64",
@@ -41,40 +51,116 @@ SYSTEM_IMAGE_CANDIDATES = [
 # ---------------------------- Environment helpers ----------------------------
 
 
-def find_unity_versions(base_unity_hub: Path) -> List[str]:
-    if not base_unity_hub.exists() or not base_unity_hub.is_dir():
-        return []
-    versions = [p.name for p in base_unity_hub.iterdir() if p.is_dir()]
-    versions.sort(reverse=True)
-    return versions
+# Every Path.exists() is a metadata syscall; install_check and emulator_setup
+# probe the same binaries repeatedly within one run, so memoize the pure
+# lookups. clear_locate_cache() resets them if the SDK layout changes on disk.
 
 
-def pick_unity_version(available: List[str], prefer: Optional[str] = None) -> Optional[str]:
-    if not available:
-        return None
-    if prefer and prefer in available:
-        return prefer
-    return available[0]
+@functools.lru_cache(maxsize=512)
+def _find_first_existing_cached(paths: Tuple[str, ...]) -> Optional[Path]:
+    # Candidates usually share a parent (adb vs adb.exe under platform-tools),
+    # so list each distinct parent once and test name membership instead of
+    # issuing one stat per candidate path.
+    names_by_parent: Dict[str, frozenset] = {}
+    for raw in paths:
+        parent = os.path.dirname(raw)
+        if parent in names_by_parent:
+            continue
+        try:
+            with os.scandir(parent or ".") as it:
+                names_by_parent[parent] = frozenset(e.name for e in it)
+        except OSError:
+            names_by_parent[parent] = frozenset()
+    for raw in paths:
+        if raw and os.path.basename(raw) in names_by_parent[os.path.dirname(raw)]:
+            return Path(raw)
+    return None
 
 
 def find_first_existing(paths: List[Path]) -> Optional[Path]:
-    for p in paths:
-        if p and p.exists():
-            return p
+    return _find_first_existing_cached(tuple(str(p) for p in paths if p))
+
+
+def _first_existing_str(parent: str, names: Tuple[str, ...]) -> Optional[str]:
+    """First name under parent that exists, joined as a plain string.
+
+    str + os.path stays well clear of pathlib's per-join object churn, which
+    matters when probing many candidate locations back to back.
+    """
+    try:
+        with os.scandir(parent) as it:
+            present = {e.name for e in it}
+    except OSError:
+        return None
+    for name in names:
+        if name in present:
+            return os.path.join(parent, name)
+    return None
+
+
+# Directories that may hold avdmanager/sdkmanager, most recent layout first.
+_MANAGER_BIN_DIRS = (
+    os.path.join("cmdline-tools", "latest", "bin"),
+    os.path.join("cmdline-tools", "bin"),
+    os.path.join("tools", "bin"),
+)
+
+
+def _find_sdk_tool(sdk: str, subdirs: Tuple[str, ...], names: Tuple[str, ...]) -> Optional[str]:
+    for subdir in subdirs:
+        found = _first_existing_str(os.path.join(sdk, subdir), names)
+        if found:
+            return found
     return None
 
 
+# TTL'd results for the recursive walks, misses included: a genuinely missing
+# tool (e.g. avdmanager) otherwise re-walks the entire SDK tree every time a
+# caller asks again. The TTL bounds staleness if the tool gets installed.
+_SEARCH_CACHE: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, Optional[Path]]] = {}
+_SEARCH_CACHE_TTL = 60.0
+
+
+def _clear_search_cache() -> None:
+    _SEARCH_CACHE.clear()
+
+
 def search_file_recursively(root: Path, candidate_names: List[str]) -> Optional[Path]:
+    cache_key = (str(root), tuple(candidate_names))
+    cached = _SEARCH_CACHE.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < _SEARCH_CACHE_TTL:
+        return cached[1]
+    result = _search_file_walk(root, candidate_names)
+    _SEARCH_CACHE[cache_key] = (time.monotonic(), result)
+    return result
+
+
+def _search_file_walk(root: Path, candidate_names: List[str]) -> Optional[Path]:
+    # One scandir-based walk matching every candidate name at once: DirEntry
+    # type checks reuse the dirent bits, so no extra stat() per entry, and the
+    # SDK tree is traversed once instead of once per name.
     if not root.exists():
         return None
-    for name in candidate_names:
-        for found in root.rglob(name):
-            if found.is_file():
-                return found
+    name_set = frozenset(candidate_names)
+    pending = deque([str(root)])
+    while pending:
+        directory = pending.popleft()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.name in name_set and entry.is_file(follow_symlinks=False):
+                            return Path(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
     return None
 
 
-@dataclass
+@dataclass(slots=True)
 class AndroidTools:
     sdk_root: Path
     jdk_root: Path
@@ -82,9 +168,42 @@ class AndroidTools:
     emulator: Path
     avdmanager: Path
     sdkmanager: Path
+    # Populated lazily by build_env: copying os.environ and recomposing PATH
+    # on every tool invocation is wasted work within a single run.
+    _env_cache: Optional[Dict[str, str]] = field(default=None, compare=False, repr=False)
 
 
-def locate_android_tools(program_files: Path = DEFAULT_PROGRAM_FILES) -> AndroidTools:
+def locate_android_tools(program_files: Optional[Path] = None) -> AndroidTools:
+    """Locate Android SDK/JDK and required binaries (memoized).
+
+    Keyed on program_files plus the SDK/JDK env vars so that changing the
+    environment between calls invalidates the cache.
+    """
+    return _locate_android_tools_cached(
+        str(program_files if program_files is not None else _program_files()),
+        os.environ.get("ANDROID_SDK_ROOT"),
+        os.environ.get("ANDROID_HOME"),
+        os.environ.get("JAVA_HOME"),
+    )
+
+
+def clear_locate_cache() -> None:
+    """Reset the memoized tool/path lookups (e.g. after installing the SDK)."""
+    _locate_android_tools_cached.cache_clear()
+    _find_first_existing_cached.cache_clear()
+
+
+@functools.lru_cache(maxsize=4)
+def _locate_android_tools_cached(
+    program_files: str,
+    _sdk_root_env: Optional[str],
+    _android_home_env: Optional[str],
+    _java_home_env: Optional[str],
+) -> AndroidTools:
+    return _locate_android_tools(Path(program_files))
+
+
+def _locate_android_tools(program_files: Path) -> AndroidTools:
     """Locate Android SDK/JDK and required binaries.
 
     Resolution order:
@@ -107,32 +226,13 @@ def locate_android_tools(program_files: Path = DEFAULT_PROGRAM_FILES) -> Android
         env_jdk = os.environ.get("JAVA_HOME")
         jdk_root = Path(env_jdk).resolve() if env_jdk else Path("")
 
-        adb = find_first_existing([
-            sdk_root / "platform-tools" / "adb",
-            sdk_root / "platform-tools" / "adb.exe",
-        ])
-        emulator = find_first_existing([
-            sdk_root / "emulator" / "emulator",
-            sdk_root / "emulator" / "emulator.exe",
-            sdk_root / "tools" / "emulator",
-            sdk_root / "tools" / "emulator.exe",
-        ])
-        avdmanager = find_first_existing([
-            sdk_root / "cmdline-tools" / "latest" / "bin" / "avdmanager",
-            sdk_root / "cmdline-tools" / "latest" / "bin" / "avdmanager.bat",
-            sdk_root / "cmdline-tools" / "bin" / "avdmanager",
-            sdk_root / "cmdline-tools" / "bin" / "avdmanager.bat",
-            sdk_root / "tools" / "bin" / "avdmanager",
-            sdk_root / "tools" / "bin" / "avdmanager.bat",
-        ])
-        sdkmanager = find_first_existing([
-            sdk_root / "cmdline-tools" / "latest" / "bin" / "sdkmanager",
-            sdk_root / "cmdline-tools" / "latest" / "bin" / "sdkmanager.bat",
-            sdk_root / "cmdline-tools" / "bin" / "sdkmanager",
-            sdk_root / "cmdline-tools" / "bin" / "sdkmanager.bat",
-            sdk_root / "tools" / "bin" / "sdkmanager",
-            sdk_root / "tools" / "bin" / "sdkmanager.bat",
-        ])
+        # Candidate probing works on plain strings; Path objects are built only
+        # for the AndroidTools fields at the end.
+        sdk = str(sdk_root)
+        adb = _first_existing_str(os.path.join(sdk, "platform-tools"), ("adb", "adb.exe"))
+        emulator = _find_sdk_tool(sdk, ("emulator", "tools"), ("emulator", "emulator.exe"))
+        avdmanager = _find_sdk_tool(sdk, _MANAGER_BIN_DIRS, ("avdmanager", "avdmanager.bat"))
+        sdkmanager = _find_sdk_tool(sdk, _MANAGER_BIN_DIRS, ("sdkmanager", "sdkmanager.bat"))
 
         if not (adb and emulator):
             raise RuntimeError("Required Android tools not found in ANDROID_SDK_ROOT (adb/emulator).")
@@ -153,76 +253,37 @@ def locate_android_tools(program_files: Path = DEFAULT_PROGRAM_FILES) -> Android
         return AndroidTools(
             sdk_root=sdk_root,
             jdk_root=jdk_root if str(jdk_root) else sdk_root,  # fallback to sdk_root to keep PATH composition safe
-            adb=adb,
-            emulator=emulator,
-            avdmanager=avdmanager if avdmanager else (sdk_root / "tools" / "bin" / "avdmanager"),
-            sdkmanager=sdkmanager if sdkmanager else (sdk_root / "tools" / "bin" / "sdkmanager"),
+            adb=Path(adb),
+            emulator=Path(emulator),
+            avdmanager=Path(avdmanager) if avdmanager else (sdk_root / "tools" / "bin" / "avdmanager"),
+            sdkmanager=Path(sdkmanager) if sdkmanager else (sdk_root / "tools" / "bin" / "sdkmanager"),
         )
 
     # ---------- 2) Windows Unity fallback ----------
-    unity_hub_editor = program_files / "Unity" / "Hub" / "Editor"
-    versions = find_unity_versions(unity_hub_editor)
-    selected = pick_unity_version(versions, prefer="6000.0.62f1")
-    if not selected:
-        raise RuntimeError("No Unity versions found under Program Files.")
-
-    android_player = unity_hub_editor / selected / "Editor" / "Data" / "PlaybackEngines" / "AndroidPlayer"
-    if not android_player.exists():
-        raise RuntimeError("AndroidPlayer folder not found under Unity installation.")
-
-    sdk_root = android_player / "SDK"
-    ndk_root = android_player / "NDK"
-    jdk_root = android_player / "OpenJDK"
-
-    if not sdk_root.exists():
-        raise RuntimeError("SDK folder not found.")
-    if not jdk_root.exists():
-        raise RuntimeError("OpenJDK folder not found.")
-
-    adb = find_first_existing([
-        sdk_root / "platform-tools" / "adb.exe",
-        sdk_root / "platform-tools" / "adb",
-    ])
-    emulator = find_first_existing([
-        sdk_root / "emulator" / "emulator.exe",
-        sdk_root / "emulator" / "emulator",
-    ])
-    avdmanager = find_first_existing([
-        sdk_root / "cmdline-tools" / "latest" / "bin" / "avdmanager.bat",
-        sdk_root / "cmdline-tools" / "latest" / "bin" / "avdmanager",
-        sdk_root / "cmdline-tools" / "bin" / "avdmanager.bat",
-        sdk_root / "cmdline-tools" / "bin" / "avdmanager",
-        sdk_root / "tools" / "bin" / "avdmanager.bat",
-        sdk_root / "tools" / "bin" / "avdmanager",
-    ])
-    sdkmanager = find_first_existing([
-        sdk_root / "cmdline-tools" / "latest" / "bin" / "sdkmanager.bat",
-        sdk_root / "cmdline-tools" / "latest" / "bin" / "sdkmanager",
-        sdk_root / "cmdline-tools" / "bin" / "sdkmanager.bat",
-        sdk_root / "cmdline-tools" / "bin" / "sdkmanager",
-        sdk_root / "tools" / "bin" / "sdkmanager.bat",
-        sdk_root / "tools" / "bin" / "sdkmanager",
-    ])
-
-    if not (adb and emulator and avdmanager and sdkmanager):
-        raise RuntimeError("Required Android tools not found (adb/emulator/avdmanager/sdkmanager).")
-
-    return AndroidTools(
-        sdk_root=sdk_root,
-        jdk_root=jdk_root,
-        adb=adb,
-        emulator=emulator,
-        avdmanager=avdmanager,
-        sdkmanager=sdkmanager,
-    )
+    # Imported lazily: CI always sets ANDROID_SDK_ROOT and never needs the
+    # Unity-specific scanning code below this point.
+    from ._unity_fallback import locate_unity_android_tools
+    return locate_unity_android_tools(program_files)
+
+
+# Unity helpers now live in _unity_fallback; resolve them lazily so plain
+# `from .emulator_setup import find_unity_versions` keeps working without
+# loading that module on CI.
+def __getattr__(name: str):
+    if name in ("find_unity_versions", "pick_unity_version"):
+        from . import _unity_fallback
+        return getattr(_unity_fallback, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ---------------------------- Subprocess helpers ----------------------------
 
 
 def build_env(tools: AndroidTools) -> Dict[str, str]:
-    """Build environment variables for SDK tool invocations."""
+    """Build environment variables for SDK tool invocations (cached per tools)."""
 
+    if tools._env_cache is not None:
+        return tools._env_cache
     env = os.environ.copy()
     env["JAVA_HOME"] = str(tools.jdk_root)
     env["ANDROID_HOME"] = str(tools.sdk_root)
@@ -236,14 +297,45 @@ def build_env(tools: AndroidTools) -> Dict[str, str]:
         str(tools.jdk_root / "bin"),
     ]
     env["PATH"] = os.pathsep.join(extra + [env_path])
+    tools._env_cache = env
     return env
 
 
-def run(cmd: List[str], env: Optional[Dict[str, str]] = None, input_text: Optional[str] = None, check: bool = True, capture: bool = True, cwd: Optional[Path] = None, timeout: Optional[int] = None) -> subprocess.CompletedProcess:
-    """Run a command, print logs, and return the CompletedProcess."""
+def run(cmd: List[str], env: Optional[Dict[str, str]] = None, input_text: Optional[str] = None, check: bool = True, capture: bool = True, cwd: Optional[Path] = None, timeout: Optional[int] = None, stream: bool = False) -> subprocess.CompletedProcess:
+    """Run a command, print logs, and return the CompletedProcess.
+
+    stream=True forwards output line-by-line as it arrives instead of
+    buffering it all; use it for long installs where buffering delays every
+    log line until completion and holds the whole transcript in memory.
+    """
 
     printable = " ".join([shlex.quote(str(c)) for c in cmd])
     print(f"$ {printable}")
+    if stream:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=(subprocess.PIPE if input_text is not None else None),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=env,
+            cwd=str(cwd) if cwd else None,
+            bufsize=1,
+            text=True,
+            errors="ignore",
+        )
+        if input_text is not None and proc.stdin is not None:
+            try:
+                proc.stdin.write(input_text)
+                proc.stdin.close()
+            except OSError:
+                pass
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            sys.stdout.write(line)
+        returncode = proc.wait(timeout=timeout)
+        if check and returncode != 0:
+            raise RuntimeError(f"Command failed (exit {returncode}): {printable}")
+        return subprocess.CompletedProcess(cmd, returncode, stdout=b"", stderr=b"")
     result = subprocess.run(
         cmd,
         input=(input_text.encode("utf-8") if input_text is not None else None),
@@ -273,7 +365,8 @@ def run(cmd: List[str], env: Optional[Dict[str, str]] = None, input_text: Option
 
 def list_avds(tools: AndroidTools, env: Dict[str, str]) -> List[str]:
     cp = run([str(tools.emulator), "-list-avds"], env=env, check=False)
-    out = (cp.stdout or b"").decode("utf-8", errors="ignore")
+    # Parsed outputs below are ASCII; skip the UTF-8 state machine.
+    out = (cp.stdout or b"").decode("ascii", errors="ignore")
     return [line.strip() for line in out.splitlines() if line.strip()]
 
 
@@ -283,22 +376,24 @@ def ensure_system_image(tools: AndroidTools, env: Dict[str, str]) -> str:
     Tries several candidates until installation succeeds. Automatically accepts licenses.
     """
 
-    # Accept licenses first
-    try:
-        run([str(tools.sdkmanager), "--licenses"], env=env, input_text=("y\n" * 100), check=False)
-    except Exception:
-        # Non-critical if it fails; installs will prompt again
-        pass
-
+    # No separate --licenses pass: the install below pipes enough "y" answers
+    # to accept any pending license prompts, so the extra JVM launch only
+    # duplicated work.
     last_error: Optional[str] = None
     for image_id in SYSTEM_IMAGE_CANDIDATES:
         try:
             print(f"Attempting to install system image: {image_id}")
-            run([str(tools.sdkmanager), "--install", image_id], env=env, input_text=("y\n" * 100), check=True)
-            # Ensure platforms and emulator are present
+            # One sdkmanager launch for image + platform + emulator: each
+            # invocation pays a multi-second JVM cold start, so coalescing
+            # the three installs amortizes it to a single launch.
             platform = image_id.split(";")[1]
-            run([str(tools.sdkmanager), "--install", f"platforms;{platform}"], env=env, input_text=("y\n" * 100), check=False)
-            run([str(tools.sdkmanager), "--install", "emulator"], env=env, input_text=("y\n" * 100), check=False)
+            run(
+                [str(tools.sdkmanager), "--install", image_id, f"platforms;{platform}", "emulator"],
+                env=env,
+                input_text=("y\n" * 100),
+                check=True,
+                stream=True,
+            )
             return image_id
         except Exception as exc:
             last_error = str(exc)
@@ -307,11 +402,15 @@ def ensure_system_image(tools: AndroidTools, env: Dict[str, str]) -> str:
     raise RuntimeError(f"No system image could be installed. Last error: {last_error}")
 
 
-def create_avd_if_missing(tools: AndroidTools, env: Dict[str, str], avd_name: str) -> str:
-    existing = list_avds(tools, env)
-    if avd_name in existing:
-        print(f"AVD already exists: {avd_name}")
-        return avd_name
+def create_avd_if_missing(tools: AndroidTools, env: Dict[str, str], avd_name: str, force_create: bool = False) -> str:
+    # force_create lets callers that already listed AVDs (and found none)
+    # skip the emulator -list-avds probe — one JVM cold start saved, and
+    # `avdmanager create --force` is idempotent anyway.
+    if not force_create:
+        existing = list_avds(tools, env)
+        if avd_name in existing:
+            print(f"AVD already exists: {avd_name}")
+            return avd_name
 
     image_id = ensure_system_image(tools, env)
     print(f"Creating AVD '{avd_name}' with image '{image_id}'")
@@ -387,11 +486,28 @@ def wait_for_boot(tools: AndroidTools, env: Dict[str, str], timeout_sec: int = 6
                 raise TimeoutError("Timeout waiting for device to appear via adb")
             time.sleep(2)
 
-    # Wait for boot property
+    # One blocking on-device wait replaces a host-side poll loop: the loop
+    # forked an adb client (plus a TCP round trip to the adb server) every
+    # 3 s for the whole boot, i.e. hundreds of process launches.
+    remaining = max(1, int(timeout_sec - (time.time() - start)))
+    wait_cmd = 'while [ "$(getprop sys.boot_completed)" != "1" ]; do sleep 1; done; echo BOOTED'
+    try:
+        cp = run([str(tools.adb), "shell", wait_cmd], env=env, check=False, timeout=remaining)
+        if b"BOOTED" in (cp.stdout or b""):
+            # A veces el launcher tarda un poco más
+            time.sleep(5)
+            return
+    except subprocess.TimeoutExpired:
+        raise TimeoutError("Timeout waiting for Android system to complete boot")
+    except Exception:
+        pass
+
+    # Fallback: the in-shell wait exited abnormally (adb hiccup, old shell);
+    # resume the original polling loop.
     while True:
         try:
             cp = run([str(tools.adb), "shell", "getprop", "sys.boot_completed"], env=env, check=False)
-            val = (cp.stdout or b"").decode("utf-8", errors="ignore").strip()
+            val = (cp.stdout or b"").decode("ascii", errors="ignore").strip()
             if val == "1":
                 # A veces el launcher tarda un poco más
                 time.sleep(5)
@@ -403,22 +519,21 @@ def wait_for_boot(tools: AndroidTools, env: Dict[str, str], timeout_sec: int = 6
         time.sleep(3)
 
 
+# Device lines from `adb devices`; bytes-level so the poll loops never decode
+# more than the captured fields.
+_ADB_DEVICE_RE = re.compile(rb"^([A-Za-z0-9._:-]+)\s+(device|offline|unauthorized|bootloader|recovery|sideload)\s*$", re.MULTILINE)
+
+
 def list_adb_devices(tools: AndroidTools, env: Dict[str, str]) -> List[Tuple[str, str]]:
     """List adb devices as (serial, state)."""
     cp = run([str(tools.adb), "devices"], env=env, check=False)
-    out = (cp.stdout or b"").decode("utf-8", errors="ignore").splitlines()
-    devices: List[Tuple[str, str]] = []
-    for line in out[1:]:  # skip header
-        line = line.strip()
-        if not line:
-            continue
-        if line.startswith("*"):
-            # daemon output lines
-            continue
-        parts = line.split()
-        if len(parts) >= 2:
-            devices.append((parts[0], parts[1]))
-    return devices
+    # One findall over the raw bytes replaces the per-line strip/split chain;
+    # wait_for_emulator_shutdown polls this every 2 s. Header and daemon
+    # lines simply never match the pattern.
+    return [
+        (serial.decode("ascii"), state.decode("ascii"))
+        for serial, state in _ADB_DEVICE_RE.findall(cp.stdout or b"")
+    ]
 
 
 def pick_emulator_serial(devices: List[Tuple[str, str]]) -> Optional[str]:
@@ -487,7 +602,7 @@ def main() -> int:
             print(f"Using existing AVD: {target_avd}")
         else:
             # No hay AVDs, creamos uno nuevo (esto puede requerir instalar imágenes)
-            target_avd = create_avd_if_missing(tools, env, DEFAULT_AVD_NAME)
+            target_avd = create_avd_if_missing(tools, env, DEFAULT_AVD_NAME, force_create=True)
             summary["actions"].append(f"created:{target_avd}")
 
         summary["avd_name"] = target_avd
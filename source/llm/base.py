@@ -2,10 +2,26 @@
 
 from __future__ import annotations
 
+import asyncio
+import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Cap on in-flight LLM API calls when several agent sessions share one
+# process; each blocking create_turn holds a slot for its duration.
+_LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "4"))
+
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _llm_slot() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(_LLM_CONCURRENCY)
+    return _llm_semaphore
 
 
 class LLMOutputType(Enum):
@@ -14,7 +30,10 @@ class LLMOutputType(Enum):
     END_TEST = "end_test"
 
 
-@dataclass
+# slots=True drops the per-instance __dict__; these are created many times
+# per turn on the parsing hot path, so the compact layout saves allocator
+# pressure and speeds attribute access.
+@dataclass(slots=True)
 class LLMOutputItem:
     type: LLMOutputType
     text: Optional[str] = None
@@ -23,13 +42,52 @@ class LLMOutputItem:
     message: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMTurnResult:
     items: List[LLMOutputItem] = field(default_factory=list)
     raw_response: Any = None
     terminal: bool = False
 
 
+class LazyRawResponse(dict):
+    """raw_response dict whose payload is produced on first access.
+
+    Subclasses dict so duck-typed callers keep working, and stays truthy
+    while still empty so ``raw_response or {}`` guards never discard it
+    unread. The producer returns a ``(resp_dict, json_str)`` pair; a
+    provider passes either an inline serializer or a background future's
+    ``.result``, so the expensive model_dump + JSON encode stays off the
+    turn critical path either way.
+    """
+
+    __slots__ = ("_produce",)
+
+    def __init__(self, produce: Callable[[], Tuple[Optional[Dict[str, Any]], Optional[str]]]):
+        super().__init__()
+        self._produce = produce
+
+    def _materialize(self) -> None:
+        produce = self._produce
+        if produce is not None:
+            self._produce = None
+            try:
+                resp_dict, raw_json = produce()
+            except Exception:
+                resp_dict, raw_json = None, None
+            super().update({"dict": resp_dict, "json_str": raw_json})
+
+    def __bool__(self) -> bool:
+        return True
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        self._materialize()
+        return super().get(key, default)
+
+    def __getitem__(self, key: Any) -> Any:
+        self._materialize()
+        return super().__getitem__(key)
+
+
 class LLMProvider(ABC):
     """Abstract interface that every LLM backend must implement."""
 
@@ -43,27 +101,71 @@ class LLMProvider(ABC):
         """Send messages + screenshot to the model and return parsed output."""
         ...
 
+    async def acreate_turn(
+        self,
+        input_messages: List[Dict[str, Any]],
+        display_width: int,
+        display_height: int,
+    ) -> LLMTurnResult:
+        """Async variant of create_turn for concurrent agent sessions.
+
+        The default implementation runs the blocking call on a worker
+        thread, gated by a process-wide semaphore so total in-flight API
+        calls stay under LLM_CONCURRENCY. Providers with native async
+        clients can override this.
+        """
+        async with _llm_slot():
+            return await asyncio.to_thread(
+                self.create_turn, input_messages, display_width, display_height
+            )
+
     @abstractmethod
     def format_system_message(self, text: str) -> Dict[str, Any]:
         """Build a provider-specific system message dict."""
         ...
 
     @abstractmethod
-    def format_user_message(self, text_parts: List[str], screenshot_data_url: Optional[str] = None) -> Dict[str, Any]:
-        """Build a provider-specific user message dict with optional screenshot."""
+    def format_user_message(self, text_parts: List[str], screenshot_data_url: Optional[Any] = None) -> Dict[str, Any]:
+        """Build a provider-specific user message dict with optional screenshot.
+
+        ``screenshot_data_url`` is either a data URL string or a pre-split
+        ``(media_type, b64)`` pair; the pair avoids re-encoding the image
+        payload in every provider.
+        """
         ...
 
 
-def create_provider(name: str = "openai", **kwargs: Any) -> LLMProvider:
+def _load_openai() -> type:
+    from .openai_provider import OpenAIProvider
+    return OpenAIProvider
+
+
+def _load_claude() -> type:
+    from .claude_provider import ClaudeProvider
+    return ClaudeProvider
+
+
+# Lazy loaders memoized on first use: the provider module (and its SDK) is
+# imported once, and dispatch is a single dict lookup instead of a branch
+# chain. Adding a provider is one entry here.
+_PROVIDERS: Dict[str, Callable[[], type]] = {
+    "openai": lru_cache(maxsize=None)(_load_openai),
+    "claude": lru_cache(maxsize=None)(_load_claude),
+}
+
+
+def create_provider(name: str = "openai", session: Any = None, **kwargs: Any) -> LLMProvider:
     """Factory function. Instantiate an LLM provider by name.
 
     Supported values: "openai" (default), "claude".
+
+    ``session`` is an optional pre-built httpx.Client; sharing one keep-alive
+    connection pool across the run avoids a TLS handshake per turn.
     """
     name = name.lower().strip()
-    if name == "openai":
-        from .openai_provider import OpenAIProvider
-        return OpenAIProvider(**kwargs)
-    if name == "claude":
-        from .claude_provider import ClaudeProvider
-        return ClaudeProvider(**kwargs)
-    raise ValueError(f"Unknown LLM provider: {name!r}. Supported: openai, claude")
+    if session is not None:
+        kwargs.setdefault("http_client", session)
+    loader = _PROVIDERS.get(name)
+    if loader is None:
+        raise ValueError(f"Unknown LLM provider: {name!r}. Supported: {', '.join(sorted(_PROVIDERS))}")
+    return loader()(**kwargs)
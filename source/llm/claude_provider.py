@@ -10,122 +10,212 @@ internally so the agent_runner can keep its stateless per-turn pattern.
 
 from __future__ import annotations
 
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 from anthropic import Anthropic
 
-from .base import LLMOutputItem, LLMOutputType, LLMProvider, LLMTurnResult
+from .base import LazyRawResponse, LLMOutputItem, LLMOutputType, LLMProvider, LLMTurnResult
+
+# orjson (optional) encodes the large raw responses in C; the stdlib path
+# stays as the fallback.
+try:
+    import orjson
+except Exception:
+    orjson = None
 
 
 DEFAULT_MODEL = os.environ.get("CLAUDE_COMPUTER_MODEL", "claude-opus-4-6")
 
 _SCROLL_STEP = 100
 
+# Screenshots older than this many turns are replaced with a text placeholder:
+# the model acts on the current frame, while every stale base64 image would be
+# re-uploaded and re-prefilled with each request.
+MAX_HISTORY_SCREENSHOTS = int(os.environ.get("CLAUDE_MAX_HISTORY_SCREENSHOTS", "2"))
+
+_SCREENSHOT_OMITTED_TEXT = "[screenshot omitted]"
+
+# Hard cap on conversation turns kept in history: prefill cost grows with
+# every assistant/tool_result pair sent back, so long substeps pay
+# quadratically without a window.
+MAX_HISTORY_TURNS = int(os.environ.get("CLAUDE_MAX_HISTORY_TURNS", "30"))
+
 
+@lru_cache(maxsize=8)
 def _resolve_versions(model: str) -> Tuple[str, str]:
-    """Pick the correct computer tool version and beta flag for the model."""
+    """Pick the correct computer tool version and beta flag for the model.
+
+    Pure function of the model string; memoized because batch suites
+    recreate a provider per test with the same model name.
+    """
     if "opus-4-5" in model or "opus-4-6" in model:
         return "computer_20251124", "computer-use-2025-11-24"
     return "computer_20250124", "computer-use-2025-01-24"
 
 
-def _normalize_action(inp: Dict[str, Any]) -> Dict[str, Any]:
-    """Convert a Claude computer-use action dict to the common format
-    expected by ``map_computer_action()``."""
-    action = inp.get("action", "")
+_COMPUTER_TOOL_TEMPLATE = {"name": "computer"}
+
+# Static schema, so it also carries the trailing cache_control that marks the
+# tool definitions (and everything before them) as a cacheable prefix —
+# Anthropic then serves the repeated schema tokens from the prompt cache
+# instead of re-billing them each turn.
+_END_TEST_TOOL = {
+    "name": "end_test",
+    "description": (
+        "Signal that the test has succeeded by calling end_test "
+        "with success=true only after the goal and success criteria are satisfied."
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "success": {
+                "type": "boolean",
+                "description": "Whether the test succeeded.",
+            }
+        },
+        "required": ["success"],
+    },
+    "cache_control": {"type": "ephemeral"},
+}
+
+
+_SCROLL_VECTORS = {
+    "down": (0, _SCROLL_STEP),
+    "up": (0, -_SCROLL_STEP),
+    "right": (_SCROLL_STEP, 0),
+    "left": (-_SCROLL_STEP, 0),
+}
+
+
+def _handle_click(inp: Dict[str, Any]) -> Dict[str, Any]:
+    x, y = inp.get("coordinate") or (0, 0)
+    return {"type": "click", "x": x, "y": y}
+
+
+def _handle_double_click(inp: Dict[str, Any]) -> Dict[str, Any]:
+    x, y = inp.get("coordinate") or (0, 0)
+    return {"type": "double_click", "x": x, "y": y}
+
+
+def _handle_type(inp: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "type", "text": inp.get("text", "")}
+
+
+def _handle_key(inp: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "key", "key": inp.get("text", "")}
+
+
+def _handle_scroll(inp: Dict[str, Any]) -> Dict[str, Any]:
+    x, y = inp.get("coordinate") or (0, 0)
+    amount = int(inp.get("scroll_amount", 3))
+    vx, vy = _SCROLL_VECTORS.get(inp.get("scroll_direction", "down"), (0, 0))
+    return {"type": "scroll", "x": x, "y": y, "scroll_x": vx * amount, "scroll_y": vy * amount}
+
+
+def _handle_drag(inp: Dict[str, Any]) -> Dict[str, Any]:
     coord = inp.get("coordinate")
+    sx, sy = inp.get("start_coordinate") or coord or (0, 0)
+    ex, ey = coord or (0, 0)
+    if inp.get("start_coordinate"):
+        ex, ey = coord or (ex, ey)
+    return {"type": "drag", "x": sx, "y": sy, "x2": ex, "y2": ey}
+
+
+def _handle_wait(inp: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "wait"}
+
 
-    if action in ("left_click", "right_click", "middle_click"):
-        x, y = coord or (0, 0)
-        return {"type": "click", "x": x, "y": y}
-
-    if action == "double_click":
-        x, y = coord or (0, 0)
-        return {"type": "double_click", "x": x, "y": y}
-
-    if action == "type":
-        return {"type": "type", "text": inp.get("text", "")}
-
-    if action == "key":
-        return {"type": "key", "key": inp.get("text", "")}
-
-    if action == "scroll":
-        x, y = coord or (0, 0)
-        direction = inp.get("scroll_direction", "down")
-        amount = int(inp.get("scroll_amount", 3))
-        scroll_x, scroll_y = 0, 0
-        if direction == "down":
-            scroll_y = amount * _SCROLL_STEP
-        elif direction == "up":
-            scroll_y = -(amount * _SCROLL_STEP)
-        elif direction == "right":
-            scroll_x = amount * _SCROLL_STEP
-        elif direction == "left":
-            scroll_x = -(amount * _SCROLL_STEP)
-        return {"type": "scroll", "x": x, "y": y, "scroll_x": scroll_x, "scroll_y": scroll_y}
-
-    if action == "left_click_drag":
-        sx, sy = inp.get("start_coordinate") or coord or (0, 0)
-        ex, ey = coord or (0, 0)
-        if inp.get("start_coordinate"):
-            ex, ey = coord or (ex, ey)
-        return {"type": "drag", "x": sx, "y": sy, "x2": ex, "y2": ey}
-
-    if action == "screenshot":
-        return {"type": "screenshot"}
-
-    if action == "wait":
-        return {"type": "wait"}
-
-    # mouse_move and any unknown actions are no-ops
+def _handle_default(inp: Dict[str, Any]) -> Dict[str, Any]:
+    # screenshot, mouse_move and any unknown actions resolve to a screenshot
     return {"type": "screenshot"}
 
 
-def _extract_screenshot_b64(msg: Dict[str, Any]) -> Optional[str]:
-    """Pull the raw base64 image data from a user message, if present."""
+_ACTION_HANDLERS = {
+    "left_click": _handle_click,
+    "right_click": _handle_click,
+    "middle_click": _handle_click,
+    "double_click": _handle_double_click,
+    "type": _handle_type,
+    "key": _handle_key,
+    "scroll": _handle_scroll,
+    "left_click_drag": _handle_drag,
+    "wait": _handle_wait,
+}
+
+
+def _normalize_action(inp: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Claude computer-use action dict to the common format
+    expected by ``map_computer_action()``.
+
+    Dispatch is a dict lookup instead of a string-compare cascade; called
+    once per tool_use block on every turn.
+    """
+    return _ACTION_HANDLERS.get(inp.get("action", ""), _handle_default)(inp)
+
+
+def _extract_screenshot_payload(msg: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Pull the (media_type, base64 data) pair from a user message, if present.
+
+    The media type travels with the data: screenshots arrive as JPEG from the
+    runner, and a tool_result that relabels them as PNG is rejected by the API.
+    """
     content = msg.get("content")
     if not isinstance(content, list):
         return None
     for block in content:
         if isinstance(block, dict) and block.get("type") == "image":
             source = block.get("source", {})
-            if source.get("type") == "base64":
-                return source.get("data")
+            if source.get("type") == "base64" and source.get("data"):
+                return source.get("media_type", "image/png"), source["data"]
     return None
 
 
-def _response_to_params(response: Any) -> List[Dict[str, Any]]:
-    """Serialize response content blocks back to API-compatible params.
+def _consume_response(response: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[LLMOutputItem]]:
+    """Build all three per-turn views of the response in one traversal.
 
-    Mirrors the official demo's ``_response_to_params`` — preserves thinking
-    blocks with their signature so Claude can validate the chain.
+    Returns the API-compatible history params (preserving thinking blocks
+    with their signature, as in the official demo, so Claude can validate
+    the chain), the pending tool_use (id, name) pairs for the next turn's
+    tool_result, and the normalized output items.
     """
     params: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    items: List[LLMOutputItem] = []
+
     for block in response.content:
-        if block.type == "text":
-            if block.text:
-                params.append({"type": "text", "text": block.text})
-        elif block.type == "thinking":
-            entry: Dict[str, Any] = {
-                "type": "thinking",
-                "thinking": getattr(block, "thinking", ""),
-            }
+        btype = block.type
+
+        if btype == "text":
+            text = block.text
+            if text:
+                params.append({"type": "text", "text": text})
+                items.append(LLMOutputItem(type=LLMOutputType.REASONING, text=text))
+
+        elif btype == "thinking":
+            thinking = getattr(block, "thinking", "")
+            entry: Dict[str, Any] = {"type": "thinking", "thinking": thinking}
             if hasattr(block, "signature"):
                 entry["signature"] = getattr(block, "signature", None)
             params.append(entry)
-        elif block.type == "tool_use":
-            params.append(block.model_dump())
-    return params
+            if thinking:
+                items.append(LLMOutputItem(type=LLMOutputType.REASONING, text=thinking))
 
+        elif btype == "tool_use":
+            params.append(block.model_dump())
+            name = block.name
+            pending.append({"id": block.id, "name": name})
+            inp = block.input
+            if name == "computer":
+                items.append(LLMOutputItem(type=LLMOutputType.COMPUTER_ACTION, action=_normalize_action(inp)))
+            elif name == "end_test":
+                items.append(LLMOutputItem(type=LLMOutputType.END_TEST, success=bool(inp.get("success", False))))
 
-def _extract_tool_use_blocks(response: Any) -> List[Dict[str, Any]]:
-    """Return (id, name) pairs for every tool_use in the response."""
-    blocks = []
-    for block in response.content:
-        if block.type == "tool_use":
-            blocks.append({"id": block.id, "name": getattr(block, "name", "")})
-    return blocks
+    return params, pending, items
 
 
 class ClaudeProvider(LLMProvider):
@@ -137,65 +227,139 @@ class ClaudeProvider(LLMProvider):
         self._history: List[Dict[str, Any]] = []
         self._pending_tool_uses: List[Dict[str, Any]] = []
         self._last_user_text: Optional[str] = None
+        # Single-worker executor for raw_response serialization: the
+        # model_dump + JSON encode of a large response runs off the turn
+        # critical path and is awaited lazily by whoever persists it.
+        self._io = ThreadPoolExecutor(max_workers=1)
 
     def format_system_message(self, text: str) -> Dict[str, Any]:
         return {"role": "system", "content": text}
 
-    def format_user_message(self, text_parts: List[str], screenshot_data_url: Optional[str] = None) -> Dict[str, Any]:
+    def format_user_message(self, text_parts: List[str], screenshot_data_url: Optional[Any] = None) -> Dict[str, Any]:
         content: List[Dict[str, Any]] = [{"type": "text", "text": t} for t in text_parts]
         if screenshot_data_url:
-            b64_data = screenshot_data_url.split(",", 1)[1]
+            if isinstance(screenshot_data_url, tuple):
+                # Pre-split (media_type, b64) payload: no copy of the
+                # hundreds-of-KB base64 string at all.
+                media_type, b64_data = screenshot_data_url
+            else:
+                # partition skips the list allocation of split(",", 1).
+                media_type = "image/png"
+                b64_data = screenshot_data_url.partition(",")[2]
             content.append({
                 "type": "image",
-                "source": {"type": "base64", "media_type": "image/png", "data": b64_data},
+                "source": {"type": "base64", "media_type": media_type, "data": b64_data},
             })
         return {"role": "user", "content": content}
 
     def _build_tools(self, display_width: int, display_height: int) -> List[Dict[str, Any]]:
+        # Only the computer tool varies (per-run tool version and display
+        # size); the end_test schema is shared by reference from the module
+        # constant instead of being rebuilt every turn.
         return [
             {
+                **_COMPUTER_TOOL_TEMPLATE,
                 "type": self._tool_version,
-                "name": "computer",
                 "display_width_px": display_width,
                 "display_height_px": display_height,
             },
-            {
-                "name": "end_test",
-                "description": (
-                    "Signal that the test has succeeded by calling end_test "
-                    "with success=true only after the goal and success criteria are satisfied."
-                ),
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "success": {
-                            "type": "boolean",
-                            "description": "Whether the test succeeded.",
-                        }
-                    },
-                    "required": ["success"],
-                },
-            },
+            _END_TEST_TOOL,
+        ]
+
+    def _trim_history(self) -> None:
+        """Drop turns beyond the MAX_HISTORY_TURNS window.
+
+        The first user message carries the goal and stays; older turns are
+        removed in (assistant, tool_result) pairs so every remaining
+        tool_result still follows the assistant turn that issued its
+        tool_use.
+        """
+        limit = 1 + MAX_HISTORY_TURNS * 2
+        excess = len(self._history) - limit
+        if excess > 0:
+            if excess % 2:
+                excess += 1
+            del self._history[1:1 + excess]
+
+    def _prune_stale_screenshots(self) -> None:
+        """Keep only the newest MAX_HISTORY_SCREENSHOTS images in history.
+
+        Older screenshots become text placeholders; this cuts hundreds of KB
+        of base64 from every request body and keeps earlier turns
+        byte-identical, which also helps the prompt-cache prefix stay stable.
+        """
+        remaining = MAX_HISTORY_SCREENSHOTS
+        for msg in reversed(self._history):
+            if msg.get("role") != "user" or not isinstance(msg.get("content"), list):
+                continue
+            content = msg["content"]
+            for j, block in enumerate(content):
+                if not isinstance(block, dict):
+                    continue
+                if block.get("type") == "tool_result" and isinstance(block.get("content"), list):
+                    inner = block["content"]
+                    for k, inner_block in enumerate(inner):
+                        if isinstance(inner_block, dict) and inner_block.get("type") == "image":
+                            if remaining > 0:
+                                remaining -= 1
+                            else:
+                                inner[k] = {"type": "text", "text": _SCREENSHOT_OMITTED_TEXT}
+                elif block.get("type") == "image":
+                    if remaining > 0:
+                        remaining -= 1
+                    else:
+                        content[j] = {"type": "text", "text": _SCREENSHOT_OMITTED_TEXT}
+
+    def _move_history_cache_breakpoint(self) -> None:
+        """Keep one rolling cache_control breakpoint inside the history.
+
+        System and tools carry a breakpoint each; a third rides the
+        second-to-last user turn so the stable conversation prefix hits the
+        prompt cache while staying under the four-breakpoint request limit.
+        """
+        user_indexes = [
+            i for i, msg in enumerate(self._history)
+            if msg.get("role") == "user" and isinstance(msg.get("content"), list)
         ]
+        for i in user_indexes:
+            for block in self._history[i]["content"]:
+                if isinstance(block, dict):
+                    block.pop("cache_control", None)
+        if len(user_indexes) >= 2:
+            content = self._history[user_indexes[-2]]["content"]
+            if content and isinstance(content[-1], dict):
+                content[-1]["cache_control"] = {"type": "ephemeral"}
 
     def _make_tool_result(
-        self, tool_id: str, tool_name: str, screenshot_b64: Optional[str],
+        self,
+        tool_id: str,
+        tool_name: str,
+        screenshot: Optional[Tuple[str, str]],
+        state_note: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Build a tool_result block, with screenshot only for the computer tool."""
+        """Build a tool_result block, with screenshot only for the computer tool.
+
+        When the runner skips the screenshot upload (unchanged frame), the
+        state note rides inside the tool_result instead, so the model still
+        learns why no image came back.
+        """
         result: Dict[str, Any] = {
             "type": "tool_result",
             "tool_use_id": tool_id,
             "is_error": False,
         }
-        if tool_name == "computer" and screenshot_b64:
+        if tool_name == "computer" and screenshot:
+            media_type, b64_data = screenshot
             result["content"] = [{
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/png",
-                    "data": screenshot_b64,
+                    "media_type": media_type,
+                    "data": b64_data,
                 },
             }]
+        elif tool_name == "computer" and state_note:
+            result["content"] = [{"type": "text", "text": state_note}]
         else:
             result["content"] = [{"type": "text", "text": "OK"}]
         return result
@@ -210,15 +374,22 @@ class ClaudeProvider(LLMProvider):
         user_msg = input_messages[1]
         system_text = system_msg["content"]
 
-        screenshot_b64 = _extract_screenshot_b64(user_msg)
+        screenshot_payload = _extract_screenshot_payload(user_msg)
 
-        # Extract the first text block from user message to detect substep changes
+        # First text block detects substep changes; the trailing one is the
+        # runner's per-turn state note, which matters when no screenshot came
+        # along (the tool_result must then carry the "no change" signal).
         user_text = None
+        state_note = None
         if isinstance(user_msg.get("content"), list):
-            for block in user_msg["content"]:
-                if isinstance(block, dict) and block.get("type") == "text":
-                    user_text = block.get("text")
-                    break
+            texts = [
+                block.get("text") for block in user_msg["content"]
+                if isinstance(block, dict) and block.get("type") == "text" and block.get("text")
+            ]
+            if texts:
+                user_text = texts[0]
+            if len(texts) > 1:
+                state_note = texts[-1]
 
         # Detect context reset: new substep or first turn.
         # System prompt is constant, but the goal text in the first user
@@ -242,7 +413,7 @@ class ClaudeProvider(LLMProvider):
             result_content: List[Dict[str, Any]] = []
             for tu in self._pending_tool_uses:
                 result_content.append(
-                    self._make_tool_result(tu["id"], tu["name"], screenshot_b64)
+                    self._make_tool_result(tu["id"], tu["name"], screenshot_payload, state_note)
                 )
             self._history.append({"role": "user", "content": result_content})
             self._pending_tool_uses = []
@@ -251,60 +422,90 @@ class ClaudeProvider(LLMProvider):
             self._history.append(user_msg)
 
         tools = self._build_tools(display_width, display_height)
+        self._prune_stale_screenshots()
+        self._move_history_cache_breakpoint()
 
         response = self._client.beta.messages.create(
             model=self._model,
-            system=self._system,
+            system=[{"type": "text", "text": self._system, "cache_control": {"type": "ephemeral"}}],
             messages=self._history,
             tools=tools,
             max_tokens=4096,
             betas=[self._beta_flag],
         )
 
-        # Serialize response content preserving thinking signatures
-        response_params = _response_to_params(response)
+        # One pass over the content blocks yields the history params
+        # (thinking signatures preserved), the pending tool_use ids for the
+        # next turn's tool_result, and the parsed output items.
+        response_params, pending_tool_uses, items = _consume_response(response)
         self._history.append({"role": "assistant", "content": response_params})
-
-        # Track pending tool_use blocks (id + name) for next turn's tool_result
-        self._pending_tool_uses = _extract_tool_use_blocks(response)
-
-        items = self._parse_response(response)
-
-        raw_json: Optional[str] = None
-        try:
-            raw_json = response.model_dump_json()
-        except Exception:
-            pass
+        self._trim_history()
+        self._pending_tool_uses = pending_tool_uses
+
+        # One model_dump walk serves both artifacts; the JSON string is derived
+        # from the dict instead of a second full pydantic traversal. The work
+        # happens on the background executor so the agent loop resumes
+        # immediately after the network call.
+        def _serialize() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+            try:
+                resp_dict = response.model_dump()
+                if orjson is not None:
+                    raw_json = orjson.dumps(resp_dict, default=str).decode("utf-8")
+                else:
+                    raw_json = json.dumps(resp_dict, separators=(",", ":"), default=str)
+                return resp_dict, raw_json
+            except Exception:
+                return None, None
 
         return LLMTurnResult(
             items=items,
-            raw_response={"dict": response.model_dump(), "json_str": raw_json},
+            raw_response=LazyRawResponse(self._io.submit(_serialize).result),
         )
 
-    def _parse_response(self, response: Any) -> List[LLMOutputItem]:
-        items: List[LLMOutputItem] = []
-        for block in response.content:
-            btype = block.type
-
-            if btype == "thinking":
-                text = getattr(block, "thinking", "")
-                if text:
-                    items.append(LLMOutputItem(type=LLMOutputType.REASONING, text=text))
-
-            elif btype == "text":
-                text = getattr(block, "text", "")
-                if text:
-                    items.append(LLMOutputItem(type=LLMOutputType.REASONING, text=text))
-
-            elif btype == "tool_use":
-                name = getattr(block, "name", "")
-                inp = getattr(block, "input", {})
-
-                if name == "computer":
-                    action = _normalize_action(inp)
-                    items.append(LLMOutputItem(type=LLMOutputType.COMPUTER_ACTION, action=action))
-                elif name == "end_test":
-                    success = bool(inp.get("success", False))
-                    items.append(LLMOutputItem(type=LLMOutputType.END_TEST, success=success))
-
-        return items
+    def create_turns_batched(
+        self,
+        turn_requests: List[Dict[str, Any]],
+        poll_interval: float = 30.0,
+        timeout: float = 86400.0,
+    ) -> List[Optional[LLMTurnResult]]:
+        """Run many independent turns through the Message Batches API.
+
+        Batched requests cost half of interactive ones and draw on separate
+        rate limits, at the price of an up-to-24h completion SLA — so this
+        is only for non-interactive stages such as suite-wide first turns
+        or post-hoc grading calls. Each entry needs the same
+        ``input_messages``/``display_width``/``display_height`` keys as
+        ``create_turn``. Results come back in input order; entries that
+        errored or expired are None. Conversation history is untouched.
+        """
+        batch_requests = []
+        for i, req in enumerate(turn_requests):
+            system_msg = req["input_messages"][0]
+            messages = req["input_messages"][1:]
+            batch_requests.append({
+                "custom_id": f"turn-{i}",
+                "params": {
+                    "model": self._model,
+                    "system": [{"type": "text", "text": system_msg["content"]}],
+                    "messages": messages,
+                    "tools": self._build_tools(req["display_width"], req["display_height"]),
+                    "max_tokens": 4096,
+                },
+            })
+
+        batch = self._client.beta.messages.batches.create(
+            requests=batch_requests, betas=[self._beta_flag],
+        )
+        deadline = time.monotonic() + timeout
+        while batch.processing_status != "ended":
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Message batch {batch.id} did not finish within {timeout:.0f}s")
+            time.sleep(poll_interval)
+            batch = self._client.beta.messages.batches.retrieve(batch.id)
+
+        results: List[Optional[LLMTurnResult]] = [None] * len(turn_requests)
+        for entry in self._client.beta.messages.batches.results(batch.id):
+            index = int(entry.custom_id.rsplit("-", 1)[1])
+            if entry.result.type == "succeeded":
+                results[index] = LLMTurnResult(items=_consume_response(entry.result.message)[2])
+        return results
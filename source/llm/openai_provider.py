@@ -2,16 +2,28 @@
 
 from __future__ import annotations
 
+import json
 import os
 from typing import Any, Dict, List, Optional, Tuple
 
 from openai import OpenAI
 
-from .base import LLMOutputItem, LLMOutputType, LLMProvider, LLMTurnResult
+from .base import LazyRawResponse, LLMOutputItem, LLMOutputType, LLMProvider, LLMTurnResult
+
+# orjson (optional) encodes the large raw responses in C; the stdlib path
+# stays as the fallback.
+try:
+    import orjson
+except Exception:
+    orjson = None
 
 
 DEFAULT_MODEL = os.environ.get("OPENAI_COMPUTER_MODEL", "gpt-5.4")
 
+# The GA computer tool takes no per-turn parameters; share one tools list
+# by reference instead of allocating it on every request.
+_TOOLS = [{"type": "computer"}]
+
 
 class OpenAIProvider(LLMProvider):
     def __init__(self, model: Optional[str] = None, **kwargs: Any):
@@ -28,9 +40,14 @@ class OpenAIProvider(LLMProvider):
             "content": [{"type": "input_text", "text": text}],
         }
 
-    def format_user_message(self, text_parts: List[str], screenshot_data_url: Optional[str] = None) -> Dict[str, Any]:
+    def format_user_message(self, text_parts: List[str], screenshot_data_url: Optional[Any] = None) -> Dict[str, Any]:
         content: List[Dict[str, Any]] = [{"type": "input_text", "text": t} for t in text_parts]
         if screenshot_data_url:
+            if isinstance(screenshot_data_url, tuple):
+                # Pre-split (media_type, b64) payload: build the data URL
+                # the Responses API needs in a single concatenation.
+                media_type, b64_data = screenshot_data_url
+                screenshot_data_url = f"data:{media_type};base64,{b64_data}"
             content.append({"type": "input_image", "image_url": screenshot_data_url, "detail": "original"})
         return {"role": "user", "content": content}
 
@@ -81,27 +98,32 @@ class OpenAIProvider(LLMProvider):
             request["input"] = input_messages
 
         resp = self._client.responses.create(**request)
-        resp_dict = resp.model_dump()
-        items, pending_call_id, terminal = self._parse_outputs(resp_dict.get("output", []))
+        # Parse straight off the pydantic objects; materializing the whole
+        # response as a dict first just to walk it again is wasted work.
+        items, pending_call_id, terminal = self._parse_outputs(resp.output or [])
         if not terminal and not pending_call_id:
             raise RuntimeError("OpenAI response did not include a computer call id")
-        self._previous_response_id = resp_dict.get("id")
+        self._previous_response_id = resp.id
         self._pending_computer_call_id = pending_call_id
 
-        raw_json: Optional[str] = None
-        try:
-            raw_json = resp.model_dump_json()
-        except Exception:
-            pass
+        # Serialization only runs when someone actually reads the raw
+        # response, so early-exit paths pay nothing.
+        def _serialize() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+            resp_dict = resp.model_dump()
+            if orjson is not None:
+                raw_json = orjson.dumps(resp_dict, default=str).decode("utf-8")
+            else:
+                raw_json = json.dumps(resp_dict, separators=(",", ":"), default=str)
+            return resp_dict, raw_json
 
         return LLMTurnResult(
             items=items,
-            raw_response={"dict": resp_dict, "json_str": raw_json},
+            raw_response=LazyRawResponse(_serialize),
             terminal=terminal,
         )
 
     def _build_tools(self) -> List[Dict[str, Any]]:
-        return [{"type": "computer"}]
+        return _TOOLS
 
     def _should_reset(self, system_text: str, conversation_anchor: str) -> bool:
         if self._previous_response_id is None:
@@ -145,28 +167,24 @@ class OpenAIProvider(LLMProvider):
                 return image_url
         return None
 
-    def _parse_outputs(self, outputs: List[Dict[str, Any]]) -> Tuple[List[LLMOutputItem], Optional[str], bool]:
+    def _parse_outputs(self, outputs: List[Any]) -> Tuple[List[LLMOutputItem], Optional[str], bool]:
         items: List[LLMOutputItem] = []
         pending_call_id: Optional[str] = None
         saw_computer_call = False
 
         for item in outputs:
-            itype = item.get("type")
+            itype = item.type
 
             if itype == "reasoning":
-                for part in (item.get("summary") or []):
-                    if not isinstance(part, dict):
+                for part in (getattr(item, "summary", None) or []):
+                    if getattr(part, "type", None) != "summary_text":
                         continue
-                    if part.get("type") != "summary_text":
-                        continue
-                    text = part.get("text", "")
+                    text = getattr(part, "text", "")
                     if text:
                         items.append(LLMOutputItem(type=LLMOutputType.REASONING, text=text))
 
             elif itype == "message":
-                for part in (item.get("content") or []):
-                    if not isinstance(part, dict):
-                        continue
+                for part in (getattr(item, "content", None) or []):
                     text = self._extract_message_text(part)
                     if text:
                         items.append(LLMOutputItem(type=LLMOutputType.REASONING, text=text))
@@ -174,27 +192,31 @@ class OpenAIProvider(LLMProvider):
             elif itype == "computer_call":
                 saw_computer_call = True
                 pending_call_id = self._parse_call_id(item)
-                for action in (item.get("actions") or []):
+                for action in (getattr(item, "actions", None) or []):
+                    # Downstream action mapping works on plain dicts; these
+                    # are the only sub-objects that need materializing.
                     if isinstance(action, dict):
                         items.append(LLMOutputItem(type=LLMOutputType.COMPUTER_ACTION, action=dict(action)))
+                    elif hasattr(action, "model_dump"):
+                        items.append(LLMOutputItem(type=LLMOutputType.COMPUTER_ACTION, action=action.model_dump()))
 
         if saw_computer_call:
             return items, pending_call_id, False
 
         return items, None, True
 
-    def _extract_message_text(self, part: Dict[str, Any]) -> str:
-        ptype = part.get("type")
+    def _extract_message_text(self, part: Any) -> str:
+        ptype = getattr(part, "type", None)
         if ptype == "output_text":
-            text = part.get("text")
+            text = getattr(part, "text", None)
             return text if isinstance(text, str) else ""
         if ptype == "refusal":
-            text = part.get("refusal") or part.get("text")
+            text = getattr(part, "refusal", None) or getattr(part, "text", None)
             return text if isinstance(text, str) else ""
         return ""
 
-    def _parse_call_id(self, item: Dict[str, Any]) -> Optional[str]:
-        call_id = item.get("call_id")
+    def _parse_call_id(self, item: Any) -> Optional[str]:
+        call_id = getattr(item, "call_id", None)
         if isinstance(call_id, str) and call_id:
             return call_id
         return None
@@ -7,30 +7,58 @@ and web report generation.
 from __future__ import annotations
 
 import json
+import os
 import shutil
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+# orjson serializes the multi-MB report payloads several times faster than
+# the stdlib encoder; fall back silently when it is not installed.
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# One shared devnull fd for every recorder start instead of per-Popen fd
+# churn; it lives for the process lifetime.
+_DEVNULL = open(os.devnull, "wb")
+
 
 class VideoRecorder:
     """Manages on-device screen recording via adb screenrecord."""
 
-    def __init__(self, device: Any, remote_path: str, local_path: Path):
+    # The recording is for QA playback only; a modest bitrate (vs the 20 Mbps
+    # screenrecord default) frees adb channel bandwidth for concurrent
+    # screencap and dumpsys traffic.
+    DEFAULT_BIT_RATE = 4_000_000
+
+    def __init__(self, device: Any, remote_path: str, local_path: Path, bit_rate: int = DEFAULT_BIT_RATE):
         self._device = device
         self._remote_path = remote_path
         self._local_path = local_path
+        self._bit_rate = bit_rate
         self._proc: Optional[subprocess.Popen] = None
+        # The adb binary and serial never change for the recorder's lifetime;
+        # build the command prefix once instead of on every call.
+        self._adb_prefix = [str(device.tools.adb)]
+        if getattr(device, "serial", None):
+            self._adb_prefix += ["-s", str(device.serial)]
+        self._adb_available = shutil.which(self._adb_prefix[0]) is not None
 
     def start(self) -> None:
+        if not self._adb_available:
+            return
         try:
-            adb_cmd = [str(self._device.tools.adb)]
-            if getattr(self._device, "serial", None):
-                adb_cmd += ["-s", str(self._device.serial)]
-            adb_cmd += ["shell", "screenrecord", "--time-limit", "7200", self._remote_path]
+            adb_cmd = list(self._adb_prefix)
+            adb_cmd += ["shell", "screenrecord", "--time-limit", "7200", "--bit-rate", str(self._bit_rate), self._remote_path]
+            # Detached session so signals aimed at the runner never hit the
+            # long-lived recorder child.
             self._proc = subprocess.Popen(
                 adb_cmd, env=self._device.env,
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                stdout=_DEVNULL, stderr=_DEVNULL,
+                start_new_session=True, close_fds=True,
             )
         except Exception:
             self._proc = None
@@ -40,18 +68,14 @@ class VideoRecorder:
         try:
             if self._proc is not None and self._proc.poll() is None:
                 try:
-                    adb_kill_cmd = [str(self._device.tools.adb)]
-                    if getattr(self._device, "serial", None):
-                        adb_kill_cmd += ["-s", str(self._device.serial)]
-                    for kill_cmd in (
-                        ["shell", "pkill", "-l", "screenrecord"],
-                        ["shell", "killall", "-2", "screenrecord"],
-                        ["shell", "sh", "-c", "kill -2 $(pidof screenrecord)"],
-                    ):
-                        try:
-                            subprocess.run(adb_kill_cmd + kill_cmd, env=self._device.env, capture_output=True, timeout=3)
-                        except Exception:
-                            pass
+                    adb_kill_cmd = list(self._adb_prefix)
+                    # All three kill variants in one adb round trip instead of
+                    # three client spawns; whichever exists on the image wins.
+                    adb_kill_cmd += [
+                        "shell", "sh", "-c",
+                        "pkill -l screenrecord; killall -2 screenrecord; kill -2 $(pidof screenrecord) 2>/dev/null; true",
+                    ]
+                    subprocess.run(adb_kill_cmd, env=self._device.env, capture_output=True, timeout=5)
                 except Exception:
                     pass
                 try:
@@ -65,19 +89,14 @@ class VideoRecorder:
             pass
 
         try:
-            adb_pull = [str(self._device.tools.adb)]
-            if getattr(self._device, "serial", None):
-                adb_pull += ["-s", str(self._device.serial)]
+            adb_pull = list(self._adb_prefix)
             adb_pull += ["pull", self._remote_path, str(self._local_path)]
             subprocess.run(adb_pull, env=self._device.env, capture_output=True, timeout=60)
-            try:
-                adb_rm = [str(self._device.tools.adb)]
-                if getattr(self._device, "serial", None):
-                    adb_rm += ["-s", str(self._device.serial)]
-                adb_rm += ["shell", "rm", "-f", self._remote_path]
-                subprocess.run(adb_rm, env=self._device.env, capture_output=True, timeout=10)
-            except Exception:
-                pass
+            adb_rm = list(self._adb_prefix)
+            adb_rm += ["shell", "rm", "-f", self._remote_path]
+            cp = subprocess.run(adb_rm, env=self._device.env, capture_output=True, timeout=10)
+            if cp.returncode != 0:
+                print("Warning: failed to remove remote recording:", self._remote_path)
         except Exception:
             pass
 
@@ -86,6 +105,16 @@ class VideoRecorder:
         return self._local_path
 
 
+# Templates ship with the package and never change mid-run; cache the bytes
+# so repeated report writes skip the stat + read + chunked copy.
+@lru_cache(maxsize=4)
+def _load_template(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
 def init_report_dirs(package: str, timestamp: str, prefix: str = "agent") -> Path:
     """Create and return the report root directory with standard subdirectories."""
     report_root = Path("reports") / f"{prefix}_{timestamp}_{package}"
@@ -103,9 +132,9 @@ def write_summary_json(report_root: Path, summary: Dict[str, Any]) -> None:
 
 def write_agent_log(report_root: Path, step_logs: List[str]) -> None:
     try:
-        with (report_root / "agent_log.txt").open("w", encoding="utf-8") as f:
-            for line in step_logs:
-                f.write(line + "\n")
+        # One join + one write instead of a Python-level loop of per-line
+        # concatenations and writes.
+        (report_root / "agent_log.txt").write_text("\n".join(step_logs) + "\n", encoding="utf-8")
     except Exception:
         pass
 
@@ -147,22 +176,24 @@ def write_web_report(
             "events": web_events,
             "substeps": substep_results,
         }
-        with (report_root / "report_data.json").open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        with (report_root / "report_data.js").open("w", encoding="utf-8") as f:
-            f.write("window.REPORT_DATA=")
-            json.dump(data, f, separators=(",", ":"))
-            f.write(";")
+        if orjson is not None:
+            pretty = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            compact = orjson.dumps(data)
+        else:
+            pretty = json.dumps(data, indent=2).encode("utf-8")
+            compact = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        (report_root / "report_data.json").write_bytes(pretty)
+        (report_root / "report_data.js").write_bytes(b"window.REPORT_DATA=" + compact + b";")
 
         templates_dir = Path(__file__).parent / "templates"
-        html_tpl = templates_dir / "agent_report.html"
-        css_tpl = templates_dir / "agent_report.css"
-        if html_tpl.exists():
-            shutil.copyfile(str(html_tpl), str(report_root / "report.html"))
+        html_tpl = _load_template(templates_dir / "agent_report.html")
+        css_tpl = _load_template(templates_dir / "agent_report.css")
+        if html_tpl is not None:
+            (report_root / "report.html").write_bytes(html_tpl)
         else:
             with (report_root / "report.html").open("w", encoding="utf-8") as f:
                 f.write("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Agent Report</title></head><body><pre>Template missing. See report_data.json</pre></body></html>")
-        if css_tpl.exists():
-            shutil.copyfile(str(css_tpl), str(report_root / "report.css"))
+        if css_tpl is not None:
+            (report_root / "report.css").write_bytes(css_tpl)
     except Exception as exc:
         print("Warning: failed to write templated report:", exc)
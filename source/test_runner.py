@@ -31,21 +31,177 @@ Additionally, it creates a report folder:
 
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
+import os
+import string
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from html import escape
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 import time
 
-from .android_framework import AndroidDevice
+from .android_framework import AndroidDevice, _sanitize_text_for_adb_input
 from .actions import execute_command
 from .app_lifecycle import parse_install_config, prepare_app, teardown_app
+from .types import WebEvent
+
+# Optional accelerated JSON: simdjson for parsing specs, orjson for both
+# directions; the stdlib stays as the final fallback.
+try:
+    import simdjson
+except Exception:
+    simdjson = None
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _dumps_pretty(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
+
+
+def _dumps_compact(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+
+# Steps that default to observe=false: the test rarely needs to inspect the
+# screen after them, so consecutive runs are batched into one adb round-trip.
+# Any step can override with an explicit "observe" flag in the JSON.
+_NON_OBSERVE_DEFAULT = frozenset({"wait", "keyevent"})
+
+# Step fields copied into web events; frozenset intersection probes the
+# (usually small) step dict once per present key instead of nine times.
+_STEP_KEYS = frozenset({"x", "y", "x1", "y1", "x2", "y2", "duration_ms", "seconds", "text"})
+
+
+def _command_to_shell(step: Dict[str, Any]) -> Optional[str]:
+    """Translate a batchable step into its device-side shell command.
+
+    Returns None for commands that need host-side handling (screenshot,
+    launch, stop, ...), which act as batch barriers.
+    """
+    cmd = step.get("cmd")
+    if cmd == "wait":
+        return f"sleep {float(step.get('seconds', 1))}"
+    if cmd == "tap":
+        return f"input tap {int(step['x'])} {int(step['y'])}"
+    if cmd == "swipe":
+        return (
+            f"input swipe {int(step['x1'])} {int(step['y1'])} "
+            f"{int(step['x2'])} {int(step['y2'])} {int(step.get('duration_ms', 300))}"
+        )
+    if cmd == "input_text":
+        return f"input text {_sanitize_text_for_adb_input(str(step['text']))}"
+    if cmd == "keyevent":
+        return f"input keyevent {step.get('code') or step.get('name')}"
+    if cmd == "back":
+        return "input keyevent 4"
+    if cmd == "home":
+        return "input keyevent 3"
+    return None
+
+
+# Static report body parsed once at import; only six placeholders vary per
+# run. `$$` escapes the dollars inside the JS template literal.
+_REPORT_TEMPLATE = string.Template("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width,initial-scale=1" />
+  <title>$title</title>
+  <style>
+    body { font-family: Arial, sans-serif; margin: 16px; }
+    .info { margin-bottom: 12px; }
+    .viewer { display: flex; gap: 16px; align-items: flex-start; }
+    img { max-width: 60vw; height: auto; border: 1px solid #ddd; border-radius: 4px; }
+    .meta { min-width: 300px; }
+    .slider { width: 60vw; }
+    .coords { font-weight: bold; color: #d00; }
+    .row { margin: 4px 0; }
+  </style>
+</head>
+<body>
+  <h1>$title</h1>
+  <div class="info">
+    <div class="row"><strong>APK:</strong> $apk</div>
+    <div class="row"><strong>Package:</strong> $package</div>
+    <div class="row"><strong>Activity:</strong> $activity</div>
+    <div class="row"><strong>Executed steps:</strong> $executed</div>
+  </div>
+  <!-- Frames are pre-rendered server-side so the browser never has to
+       JSON.parse image paths; loading="lazy" keeps hidden frames unfetched. -->
+  <ul id="frames" hidden>$items_html</ul>
+  <div class="viewer">
+    <div>
+      <img id="shot" src="" alt="screenshot" />
+      <input id="range" class="slider" type="range" min="1" max="1" value="1" />
+      <div>
+        <button id="prev">Prev</button>
+        <button id="next">Next</button>
+      </div>
+    </div>
+    <div class="meta">
+      <div class="row"><strong>Index:</strong> <span id="idx"></span></div>
+      <div class="row"><strong>Command:</strong> <span id="cmd"></span></div>
+      <div class="row"><strong>Details:</strong> <span id="details"></span></div>
+      <div class="row"><strong>Click:</strong> <span id="coords" class="coords"></span></div>
+    </div>
+  </div>
+  <script>
+    const events = $events_json;
+    const frames = document.querySelectorAll('#frames img');
+    const img = document.getElementById('shot');
+    const range = document.getElementById('range');
+    const prev = document.getElementById('prev');
+    const next = document.getElementById('next');
+    const idxEl = document.getElementById('idx');
+    const cmdEl = document.getElementById('cmd');
+    const detEl = document.getElementById('details');
+    const coordsEl = document.getElementById('coords');
+
+    function show(i) {
+      const ev = events[i];
+      img.src = frames[i] ? frames[i].getAttribute('src') : '';
+      idxEl.textContent = ev.i ?? (i+1);
+      cmdEl.textContent = ev.c ?? '';
+      detEl.textContent = JSON.stringify(ev.d ?? {});
+      coordsEl.textContent = ev.xy ? `($${ev.xy[0]}, $${ev.xy[1]})` : '-';
+      range.value = i+1;
+    }
+
+    function setMax() {
+      range.max = events.length;
+    }
+
+    range.addEventListener('input', () => show(parseInt(range.value)-1));
+    prev.addEventListener('click', () => { const v = Math.max(1, parseInt(range.value)-1); range.value = v; show(v-1); });
+    next.addEventListener('click', () => { const v = Math.min(events.length, parseInt(range.value)+1); range.value = v; show(v-1); });
+
+    setMax();
+    if (events.length > 0) show(0);
+  </script>
+</body>
+</html>
+""")
 
 
 def load_test_json(path: Path) -> Dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    data = path.read_bytes()
+    if simdjson is not None:
+        return simdjson.Parser().parse(data).as_dict()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def main() -> int:
@@ -53,7 +209,10 @@ def main() -> int:
         print("Usage: python -m source.test_runner <test.json>")
         return 2
 
-    test_path = Path(sys.argv[1]).resolve()
+    # resolve() stats every component; skip it for already-absolute paths
+    test_path = Path(sys.argv[1])
+    if not test_path.is_absolute():
+        test_path = test_path.resolve()
     spec = load_test_json(test_path)
 
     package = str(spec["package"])  # required
@@ -66,14 +225,43 @@ def main() -> int:
     if not install_config.skip_install and not apk_spec:
         print("ERROR: 'apk' is required unless skip_install=true or skip_stall=true")
         return 2
-    apk_path: Optional[Path] = Path(apk_spec).resolve() if apk_spec else None
+    apk_path: Optional[Path] = None
+    if apk_spec:
+        apk_path = Path(apk_spec)
+        if not apk_path.is_absolute():
+            apk_path = apk_path.resolve()
 
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_root = Path("reports") / f"{ts}_{package}"
+    # time.strftime is pure C and noticeably faster than datetime.now().strftime
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    # Plain string paths for the per-step screenshot writes; the Path views
+    # exist only for the handful of report-level writes at the end.
+    shots_dir = os.path.join("reports", f"{ts}_{package}", "screenshots")
+    os.makedirs(shots_dir, exist_ok=True)
+    report_root = Path(shots_dir).parent
     screenshots_dir = report_root / "screenshots"
-    screenshots_dir.mkdir(parents=True, exist_ok=True)
 
-    events: List[Dict[str, Any]] = []
+    # Slotted WebEvent instances instead of ad-hoc dicts: roughly half the
+    # per-event memory on long runs; converted to dicts once at write time.
+    events: List[WebEvent] = []
+
+    # Durable per-step stream: each event is appended and flushed as it
+    # happens, so a killed run still leaves a parseable record even though
+    # summary.json and report.html are only written at the end. Gzip at
+    # level 1 shrinks the stream 5-10x for near-zero CPU, and each flush
+    # is a zlib sync point, so a truncated stream stays decodable.
+    try:
+        events_file = gzip.open(report_root / "events.ndjson.gz", "wb", compresslevel=1)
+    except Exception:
+        events_file = None
+
+    def record_event(evt: WebEvent) -> None:
+        events.append(evt)
+        if events_file is not None:
+            try:
+                events_file.write(_dumps_compact(evt.to_dict()).encode("utf-8") + b"\n")
+                events_file.flush()
+            except Exception:
+                pass
 
     summary: Dict[str, Any] = {
         "ok": False,
@@ -83,7 +271,7 @@ def main() -> int:
         "package": package,
         "activity": activity,
         "report_dir": str(report_root),
-        "steps": events,
+        "steps": [],
     }
     try:
         device = AndroidDevice.connect()
@@ -91,54 +279,156 @@ def main() -> int:
 
         prepare_app(device, package, apk_path, activity, install_config)
 
+        # Runs of non-observe steps accumulate here and flush through one
+        # adb shell invocation; each flush costs a single screenshot instead
+        # of one per step.
+        pending: List[Tuple[int, Dict[str, Any], str]] = []
+
+        # Screenshot fetches run on this single worker so they overlap the
+        # next step's command dispatch; one outstanding shot at a time keeps
+        # file writes ordered. Steps that must see the frame from strictly
+        # before them can set "sync": true.
+        shot_pool = ThreadPoolExecutor(max_workers=1)
+        pending_shot: Optional[Future] = None
+
+        # Wait-heavy runs capture many pixel-identical frames; hashing the
+        # raw capture is far cheaper than writing it, so duplicates become
+        # hard links to the previous file (copy as the portable fallback).
+        # Runs only on the single shot worker, so the state needs no lock.
+        prev_shot: Dict[str, Any] = {"digest": None, "path": None}
+
+        def capture_shot(path: str) -> None:
+            data = device.screenshot_bytes()
+            digest = hashlib.sha256(data).digest()
+            if digest == prev_shot["digest"] and prev_shot["path"] is not None:
+                try:
+                    os.link(prev_shot["path"], path)
+                    return
+                except OSError:
+                    pass
+            with open(path, "wb") as f:
+                f.write(data)
+            prev_shot["digest"] = digest
+            prev_shot["path"] = path
+
+        def wait_pending_shot() -> None:
+            nonlocal pending_shot
+            if pending_shot is not None:
+                try:
+                    pending_shot.result()
+                except Exception as exc:
+                    print("Warning: auto-screenshot failed:", exc)
+                pending_shot = None
+
+        def flush_batch() -> None:
+            nonlocal pending_shot
+            if not pending:
+                return
+            print(f"Executing batch of {len(pending)} steps: {[s.get('cmd') for _, s, _ in pending]}")
+            device.shell_batch([c for _, _, c in pending])
+            last_i = pending[-1][0]
+            shot_name = f"step_{last_i:03d}_batch.png"
+            wait_pending_shot()
+            pending_shot = shot_pool.submit(capture_shot, os.path.join(shots_dir, shot_name))
+            image = "screenshots/" + shot_name
+            for bi, bstep, _ in pending:
+                details = {k: bstep[k] for k in _STEP_KEYS.intersection(bstep)}
+                record_event(WebEvent(
+                    index=bi, substep=0, cmd=bstep.get("cmd", "step"),
+                    image=image, details=details or None,
+                ))
+            summary["executed"] = last_i
+            pending.clear()
+
         for i, step in enumerate(steps, start=1):
+            # Bind .get once per step: the loop probes the dict several
+            # times and LOAD_FAST beats repeated method lookups.
+            step_get = step.get
+            cmd_name = step_get("cmd", "step")
+            observe = bool(step_get("observe", cmd_name not in _NON_OBSERVE_DEFAULT))
+            shell_cmd = None if observe else _command_to_shell(step)
+            if shell_cmd is not None:
+                pending.append((i, step, shell_cmd))
+                continue
+
+            flush_batch()
+            if step_get("sync"):
+                wait_pending_shot()
             print(f"Executing step {i}: {step}")
             execute_command(device, step, package=package)
-            # auto-screenshot after each step
-            cmd_name = step.get("cmd", "step")
-            auto_path = screenshots_dir / f"step_{i:03d}_{cmd_name}.png"
-            try:
-                if cmd_name == "tap":
-                    x = int(step["x"])
-                    y = int(step["y"])
-                    device.screenshot_with_marker(auto_path, x, y)
-                    events.append({
-                        "index": i,
-                        "cmd": cmd_name,
-                        "x": x,
-                        "y": y,
-                        "image": f"screenshots/{auto_path.name}",
-                    })
-                else:
-                    device.screenshot(auto_path)
-                    evt: Dict[str, Any] = {"index": i, "cmd": cmd_name, "image": f"screenshots/{auto_path.name}"}
-                    for k in ("x", "y", "x1", "y1", "x2", "y2", "duration_ms", "seconds", "text"):
-                        if k in step:
-                            evt[k] = step[k]
-                    events.append(evt)
-            except Exception as exc:
-                print("Warning: auto-screenshot failed:", exc)
+            # auto-screenshot after each observed step, fetched concurrently
+            # with the following step's dispatch; the relative name is built
+            # once and reused for both the capture path and the event record
+            shot_name = f"step_{i:03d}_{cmd_name}.png"
+            wait_pending_shot()
+            if cmd_name == "tap":
+                x = int(step["x"])
+                y = int(step["y"])
+                pending_shot = shot_pool.submit(
+                    device.screenshot_with_marker, screenshots_dir / shot_name, x, y)
+                record_event(WebEvent(
+                    index=i, substep=0, cmd=cmd_name, x=x, y=y,
+                    image="screenshots/" + shot_name,
+                ))
+            else:
+                pending_shot = shot_pool.submit(capture_shot, os.path.join(shots_dir, shot_name))
+                details = {k: step[k] for k in _STEP_KEYS.intersection(step)}
+                record_event(WebEvent(
+                    index=i, substep=0, cmd=cmd_name,
+                    image="screenshots/" + shot_name, details=details or None,
+                ))
             summary["executed"] = i
 
+        flush_batch()
+        wait_pending_shot()
+        shot_pool.shutdown(wait=True)
+
         summary["ok"] = True
     except Exception as exc:
         msg = str(exc)
         print("ERROR:", msg)
         summary["errors"].append(msg)
         summary["ok"] = False
-    # Final wait before teardown
-    try:
-        print("Final wait before teardown (5s)...")
-        time.sleep(5)
-    except Exception:
-        pass
+    # Final wait before teardown; NSPOON_FAST=1 or --no-final-wait trades the
+    # 5 s settle window for a best-effort device-side sync. The app may not
+    # have flushed all of its state by teardown in that mode.
+    fast = os.environ.get("NSPOON_FAST") == "1" or "--no-final-wait" in sys.argv[2:]
+    if fast:
+        try:
+            device.shell_batch(["sync"])
+        except Exception:
+            pass
+    else:
+        try:
+            print("Final wait before teardown (5s)...")
+            time.sleep(5)
+        except Exception:
+            pass
+
+    # Teardown (uninstall + adb cleanup) runs on a worker so its couple of
+    # seconds overlap the summary/report writes below instead of adding to
+    # the run tail.
+    teardown_pool = ThreadPoolExecutor(max_workers=1)
+    teardown_fut = teardown_pool.submit(
+        teardown_app, device, package, install_config.uninstall_after)
 
-    teardown_app(device, package, install_config.uninstall_after)
+    if events_file is not None:
+        try:
+            events_file.close()
+        except Exception:
+            pass
+
+    event_dicts = [e.to_dict() for e in events]
+    summary["steps"] = event_dicts
+    summary["events_file"] = "events.ndjson.gz"
 
     # Write summary.json in report folder
     try:
-        with (report_root / "summary.json").open("w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2)
+        # tmp + os.replace: a SIGINT mid-write never leaves a truncated
+        # summary behind, and bytes skip the TextIOWrapper encoding pass.
+        tmp_summary = report_root / ".summary.json.tmp"
+        tmp_summary.write_bytes(_dumps_pretty(summary).encode("utf-8"))
+        os.replace(tmp_summary, report_root / "summary.json")
     except Exception as exc:
         print("Warning: failed to write report summary:", exc)
 
@@ -146,90 +436,47 @@ def main() -> int:
     try:
         html_path = report_root / "report.html"
         title = f"Test Report - {package}"
-        html = f"""
-<!DOCTYPE html>
-<html lang=\"en\">
-<head>
-  <meta charset=\"utf-8\" />
-  <meta name=\"viewport\" content=\"width=device-width,initial-scale=1\" />
-  <title>{title}</title>
-  <style>
-    body {{ font-family: Arial, sans-serif; margin: 16px; }}
-    .info {{ margin-bottom: 12px; }}
-    .viewer {{ display: flex; gap: 16px; align-items: flex-start; }}
-    img {{ max-width: 60vw; height: auto; border: 1px solid #ddd; border-radius: 4px; }}
-    .meta {{ min-width: 300px; }}
-    .slider {{ width: 60vw; }}
-    .coords {{ font-weight: bold; color: #d00; }}
-    .row {{ margin: 4px 0; }}
-  </style>
-</head>
-<body>
-  <h1>{title}</h1>
-  <div class=\"info\">
-    <div class=\"row\"><strong>APK:</strong> {summary['apk']}</div>
-    <div class=\"row\"><strong>Package:</strong> {package}</div>
-    <div class=\"row\"><strong>Activity:</strong> {activity}</div>
-    <div class=\"row\"><strong>Executed steps:</strong> {summary['executed']}</div>
-  </div>
-  <div class=\"viewer\">
-    <div>
-      <img id=\"shot\" src=\"\" alt=\"screenshot\" />
-      <input id=\"range\" class=\"slider\" type=\"range\" min=\"1\" max=\"1\" value=\"1\" />
-      <div>
-        <button id=\"prev\">Prev</button>
-        <button id=\"next\">Next</button>
-      </div>
-    </div>
-    <div class=\"meta\">
-      <div class=\"row\"><strong>Index:</strong> <span id=\"idx\"></span></div>
-      <div class=\"row\"><strong>Command:</strong> <span id=\"cmd\"></span></div>
-      <div class=\"row\"><strong>Details:</strong> <span id=\"details\"></span></div>
-      <div class=\"row\"><strong>Click:</strong> <span id=\"coords\" class=\"coords\"></span></div>
-    </div>
-  </div>
-  <script>
-    const events = {json.dumps(events)};
-    const img = document.getElementById('shot');
-    const range = document.getElementById('range');
-    const prev = document.getElementById('prev');
-    const next = document.getElementById('next');
-    const idxEl = document.getElementById('idx');
-    const cmdEl = document.getElementById('cmd');
-    const detEl = document.getElementById('details');
-    const coordsEl = document.getElementById('coords');
-
-    function show(i) {{
-      const ev = events[i];
-      img.src = ev.image;
-      idxEl.textContent = ev.index ?? (i+1);
-      cmdEl.textContent = ev.cmd ?? '';
-      const det = {{...ev}}; delete det.image; delete det.cmd; delete det.index; delete det.x; delete det.y;
-      detEl.textContent = JSON.stringify(det);
-      coordsEl.textContent = (ev.x !== undefined && ev.y !== undefined) ? `(${{ev.x}}, ${{ev.y}})` : '-';
-      range.value = i+1;
-    }}
-
-    function setMax() {{
-      range.max = events.length;
-    }}
-
-    range.addEventListener('input', () => show(parseInt(range.value)-1));
-    prev.addEventListener('click', () => {{ const v = Math.max(1, parseInt(range.value)-1); range.value = v; show(v-1); }});
-    next.addEventListener('click', () => {{ const v = Math.min(events.length, parseInt(range.value)+1); range.value = v; show(v-1); }});
-
-    setMax();
-    if (events.length > 0) show(0);
-  </script>
-</body>
-</html>
-"""
-        with html_path.open("w", encoding="utf-8") as f:
-            f.write(html)
+        # Short-key projection of the events for the embedded blob: the full
+        # records live in summary.json, while the HTML only needs what the
+        # viewer displays, which keeps payload size and JSON.parse time down.
+        # Image paths go into a pre-rendered frame list instead, so the
+        # browser lazy-loads them straight from the DOM.
+        slim = [
+            {
+                "i": e.get("index"),
+                "c": e.get("cmd"),
+                "xy": [e["x"], e["y"]] if "x" in e and "y" in e else None,
+                "d": {k: e[k] for k in ("x1", "y1", "x2", "y2", "duration_ms", "seconds", "text") if k in e},
+            }
+            for e in event_dicts
+        ]
+        items_html = "".join(
+            f'<li data-idx="{e.get("index", "")}"><img loading="lazy" '
+            f'src="{escape(str(e.get("image") or ""), quote=True)}"></li>'
+            for e in event_dicts
+        )
+        html = _REPORT_TEMPLATE.substitute(
+            title=title,
+            apk=summary["apk"],
+            package=package,
+            activity=activity,
+            executed=summary["executed"],
+            events_json=_dumps_compact(slim),
+            items_html=items_html,
+        )
+        tmp_html = report_root / ".report.html.tmp"
+        tmp_html.write_bytes(html.encode("utf-8"))
+        os.replace(tmp_html, html_path)
     except Exception as exc:
         print("Warning: failed to write report.html:", exc)
 
-    print(json.dumps(summary, indent=2))
+    try:
+        teardown_fut.result(timeout=30)
+    except Exception as exc:
+        print("Warning: teardown did not finish cleanly:", exc)
+    teardown_pool.shutdown(wait=False)
+
+    print(_dumps_pretty(summary))
     return 0 if summary["ok"] else 1
 
 
@@ -6,7 +6,7 @@ from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class StepSpec:
     """A single substep within a test (goal + optional guidance)."""
     goal: str = ""
@@ -15,14 +15,14 @@ class StepSpec:
     success_criteria: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class InstallConfig:
     """Controls APK installation and teardown behavior."""
     skip_install: bool = False
     uninstall_after: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class TestSpec:
     """Parsed representation of a JSON test specification."""
     package: str
@@ -34,7 +34,7 @@ class TestSpec:
     install_config: InstallConfig = field(default_factory=InstallConfig)
 
 
-@dataclass
+@dataclass(slots=True)
 class ScreenInfo:
     """Physical and logical screen dimensions."""
     physical_width: int
@@ -54,7 +54,7 @@ class ScreenInfo:
         return self.physical_height
 
 
-@dataclass
+@dataclass(slots=True)
 class SubstepResult:
     """Outcome of a single substep within the agent loop."""
     index: int
@@ -66,7 +66,7 @@ class SubstepResult:
     success_criteria: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class WebEvent:
     """A single event captured for the web report viewer."""
     index: int
@@ -80,6 +80,9 @@ class WebEvent:
     canvas: Optional[str] = None
     reason: str = ""
     success: Optional[bool] = None
+    # Command-specific extras (swipe coordinates, wait seconds, input text);
+    # merged flat into the serialized dict.
+    details: Optional[Dict[str, Any]] = None
 
     def to_dict(self) -> Dict[str, Any]:
         d: Dict[str, Any] = {"index": self.index, "substep": self.substep, "cmd": self.cmd}
@@ -99,4 +102,6 @@ class WebEvent:
             d["reason"] = self.reason
         if self.success is not None:
             d["success"] = self.success
+        if self.details:
+            d.update(self.details)
         return d